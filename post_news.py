@@ -1,4 +1,3 @@
-
 import argparse
 import json
 import logging
@@ -6,16 +5,24 @@ import os
 import re
 import sys
 from datetime import datetime, date, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 from openai import OpenAI
-import subprocess
 import requests
 from collections import defaultdict
 import concurrent.futures
 import time
-import random
 import hashlib
+import threading
 from post_news_linkedin import LinkedInScraper
+from post_news_limits import PRIORITY_GENERATION, PRIORITY_JUDGE, PRIORITY_SUMMARY, scheduler
+from post_news_response_cache import ResponseCache
+from post_news_dedup import CitationCoverage, StoryIndex, dedupe_documents
+from post_news_http import ProviderError, request_with_retry
+from post_news_metrics import metrics
+from post_news_relevance import filter_posts
+from post_news_seen import ARXIV, POST, URL, SeenIndex
+from post_news_checkpoint import RunCheckpoint
+from post_news_hedging import gather_quorum
 
 
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY", "...")
@@ -35,115 +42,646 @@ logging.basicConfig(
 )
 
 CACHE_DIR = 'post_news_cache'
+
+# Each run writes its metrics report to RUNS_DIR/<run id>.
+RUNS_DIR = 'post_news_runs'
+
+# API endpoints. Overridable so the benchmark harness can point them at local stubs;
+# the OpenAI client reads OPENAI_BASE_URL itself.
+PERPLEXITY_API_URL = os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
+FIRECRAWL_API_URL = os.getenv("FIRECRAWL_API_URL", "https://api.firecrawl.dev/v1/scrape")
+PUBLISH_URL = os.getenv("PUBLISH_URL", "https://www.chrisclark.com/create_markdown_post.php")
+
+# Shared cache for Firecrawl, Perplexity and OpenAI responses and paper summaries,
+# in a single SQLite file. Fan-out calls that are meant to return different samples
+# for the same prompt pass cache=False. Maintained with
+# `python post_news_response_cache.py stats|prune|migrate`.
+response_cache = ResponseCache(os.path.join(CACHE_DIR, 'cache.sqlite3'))
+
+# Index of the arXiv IDs, citation URLs and LinkedIn posts already published.
+# With SKIP_PUBLISHED, covered items are dropped before summarization and generation.
+# A news story counts as covered once at least COVERED_CITATION_SHARE of its
+# citation URLs were published; a single shared section page or roundup link isn't
+# enough. ALLOW_FOLLOWUPS keeps every story that cites at least one new URL.
+SEEN_INDEX_PATH = 'post_news_seen.sqlite3'
+SKIP_PUBLISHED = True
+COVERED_CITATION_SHARE = 0.75
+ALLOW_FOLLOWUPS = False
+seen_index = SeenIndex(SEEN_INDEX_PATH)
+
+# Number of arXiv papers scraped and summarized at the same time.
+PAPER_CONCURRENCY = 4
+
+# Days of Hugging Face paper listings to cover. More than 1 is a backfill, e.g. 7
+# for a weekly roundup; the listings are fetched concurrently.
+HF_DAYS_IN_PAST = 1
+
+# Collapse near-duplicate stories across all sources before building the report.
+DEDUPE_REPORT = True
+
+# Reuse a running debug-port Chrome across runs instead of launching and killing
+# one every time. Useful for frequent scheduled runs.
+LINKEDIN_KEEP_ALIVE = os.getenv("LINKEDIN_KEEP_ALIVE", "0") == "1"
+
+# Lean scraping profile for Linux workers: headless Chrome/Chromium with images,
+# media, fonts and trackers blocked. The binary comes from CHROME_PATH or PATH.
+LINKEDIN_LEAN_PROFILE = os.getenv("LINKEDIN_LEAN_PROFILE", "0") == "1"
+
+# Adaptive scrolling: wait on new posts rendering instead of fixed sleeps and stop
+# once scrolls keep finding next to nothing new. Scrolling also stops after
+# LINKEDIN_MAX_POSTS unique posts or LINKEDIN_TIME_BUDGET seconds; set either to an
+# empty string for no limit. The time budget leaves room within the LinkedIn source
+# timeout to filter the posts.
+LINKEDIN_ADAPTIVE_SCROLL = os.getenv("LINKEDIN_ADAPTIVE_SCROLL", "1") == "1"
+LINKEDIN_MAX_POSTS = int(os.getenv("LINKEDIN_MAX_POSTS", "") or 0) or None
+LINKEDIN_TIME_BUDGET = float(os.getenv("LINKEDIN_TIME_BUDGET", "480") or 0) or None
+
+# Stream Perplexity answers and judge verdicts instead of waiting for full responses.
+# Streamed Perplexity answers are indexed for dedup as soon as each one completes,
+# and the judge stops reading once its verdict token arrives.
+STREAM_PERPLEXITY = True
+STREAM_JUDGE = True
+# A streamed verdict: the response opens with a standalone A or B, i.e. one that is
+# already followed by a non-word character, so "Answer: B" is not read as A.
+VERDICT_PATTERN = re.compile(r'^\W*([AB])\W')
+
+# Story units of already received documents, shared with the dedup stage.
+story_index = StoryIndex()
+
+# Long papers are split on section headings into chunks of about this many tokens,
+# summarized in parallel and then merged.
+SUMMARY_CHUNK_TOKENS = 12000
+
+# How candidates are written: "sections" routes the report's stories to their
+# section up front and writes every section in parallel from only its own stories,
+# making up to SECTION_ATTEMPTS attempts per section draft; "whole" writes each
+# candidate from the full report in one prompt.
+GENERATION_MODE = "sections"
+SECTION_ATTEMPTS = 2
+
+# Newsletter sections in order, with what one item of each is called.
+SECTIONS = {
+    "Arxiv Papers": "Arxiv Paper",
+    "News Stories": "News Story",
+    "LinkedIn Buzz": "LinkedIn Buzz Post",
+}
+
+# How the best candidate is picked: "tournament" runs the pairwise bracket in
+# rank_answers, "pointwise" scores every candidate once against SCORING_RUBRIC.
+RANKING_MODE = "tournament"
+
+# Criteria the pointwise judge scores from 0 to 10; the total decides the winner.
+SCORING_RUBRIC = {
+    "story_count": "How many distinct, substantive AI stories the document covers.",
+    "citation_coverage": "How many stories cite their source as a [Read more](<citation source>) link.",
+    "section_correctness": "Single '# AI News for <date>' title and every story under the right one of the Arxiv Papers, News Stories and LinkedIn Buzz sections.",
+}
+
+# Source collection budgets in seconds. Each collector gets its own timeout and the
+# whole collection stage stops waiting once SOURCE_DEADLINE has passed.
+SOURCE_DEADLINE = 900
+SOURCE_TIMEOUTS = {
+    "huggingface": 900,
+    "linkedin": 600,
+    "perplexity": 300,
+}
+# Seconds between checks of the stop signal collect_sources sets on a source that ran
+# out of time, while a collector waits on its own workers.
+SOURCE_STOP_POLL_SECONDS = 1.0
+
+# Quorum and hedging for the Perplexity and candidate fan-outs. A fan-out moves on
+# once its quorum of results is in or its deadline has passed and abandons the rest.
+# With HEDGE_REQUESTS, a call still running after the p95 running time of its call
+# type gets one duplicate, with running time counted from when the scheduler admits
+# the call, so calls waiting in a lane are never duplicated. The p95 comes from this
+# run's metrics once the call type has HEDGE_MIN_SAMPLES calls, otherwise from
+# HEDGE_DEFAULT_DELAYS.
+PERPLEXITY_QUORUM = 8  # of 10; the answers overlap heavily and are deduplicated anyway
+PERPLEXITY_DEADLINE = 240  # below SOURCE_TIMEOUTS["perplexity"], so partial results are kept
+ANSWER_QUORUM = 8  # of 8; hedging alone cuts the tail without losing candidates
+ANSWER_DEADLINE = 600
+HEDGE_REQUESTS = True
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 5
+HEDGE_DEFAULT_DELAYS = {
+    "perplexity_answer": 90,
+    "candidate": 120,
+    "section_draft": 120,
+}
+
+# Adaptive sampling for the Perplexity fan-out: answers are requested
+# PERPLEXITY_IN_FLIGHT at a time, and no more are requested once
+# PERPLEXITY_PATIENCE answers in a row each added fewer than
+# PERPLEXITY_MIN_NEW_CITATIONS citation URLs not seen in earlier answers.
+ADAPTIVE_PERPLEXITY = True
+PERPLEXITY_IN_FLIGHT = 5
+PERPLEXITY_MIN_NEW_CITATIONS = 2
+PERPLEXITY_PATIENCE = 2
+
+# Citation coverage against cost of the last Perplexity fan-out, for the run report.
+perplexity_coverage: Dict = {}
     
-def call_firecrawl_scrape(retrieve_url: str) -> str:
-    retval = ""
+def call_firecrawl_scrape(retrieve_url: str, cache: bool = True) -> str:
+    """
+    Scrapes a URL with Firecrawl and returns its markdown.
+
+    Raises:
+        ProviderError: If the scrape fails after retries.
+    """
+    cache_key = ResponseCache.make_key("firecrawl", "", retrieve_url)
+    if cache:
+        cached = response_cache.get("firecrawl", cache_key)
+        if cached is not None:
+            return cached
+    url = FIRECRAWL_API_URL
+
+    payload = {
+        "url": retrieve_url,
+        "formats": ["markdown"],
+        "waitFor": 0,
+        "skipTlsVerification": False,
+        "timeout": 180000,
+        "removeBase64Images": True
+    }
+    headers = {
+        "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    with scheduler.slot("firecrawl", "scrape"):
+        response = request_with_retry("firecrawl", "POST", url, model="scrape", json=payload, headers=headers, timeout=190)
     try:
-        url = "https://api.firecrawl.dev/v1/scrape"
-
-        payload = {
-            "url": retrieve_url,
-            "formats": ["markdown"],
-            "waitFor": 0,
-            "skipTlsVerification": False,
-            "timeout": 180000,
-            "removeBase64Images": True
-        }
-        headers = {
-            "Authorization": f"Bearer {FIRECRAWL_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        retval = requests.request("POST", url, json=payload, headers=headers)
-        retval = retval.text
-
-        print(f"Firecrawl response\n\n{retval}")
+        data = response.json()
+    except ValueError as e:
+        raise ProviderError("firecrawl", f"Invalid JSON response for {retrieve_url}: {e}") from e
+    if not data.get("success", True):
+        raise ProviderError("firecrawl", f"Scrape of {retrieve_url} failed: {data.get('error')}")
+    retval = (data.get("data") or {}).get("markdown") or ""
+    if cache:
+        response_cache.put("firecrawl", cache_key, retval, model="scrape")
 
-    except Exception as e:
-        retval = f"Error returning markdown data from {retrieve_url}: {str(e)}"
+    print(f"Firecrawl response\n\n{retval}")
     return retval
 
-def get_post(query: str) -> str:
-    # month, week, day, hour.
-    perplexity_responses = generate_perplexity_responses(query, 10)
-    report = ""
-    for perplexity_response in perplexity_responses:
-        report += f"\n```Article\n{perplexity_response}\n```\n"
-    initial_answers = generate_initial_answers(report, 8)
-    return rank_answers(initial_answers)
-
-def get_linkedin_posts() -> str:
-    ls = LinkedInScraper()
-    posts = ls.run()
-    response = "\n".join(posts)
-    response = call_openai(f"Remove posts not related to Artificial Intelligence, Machine Learning, or Large Language Models.\n\n{response}")
-    return response
-
-def get_huggingface_papers(days_in_past: int) -> List[str]:
+def get_post(query: str, checkpoint: Optional[RunCheckpoint] = None) -> str:
+    """
+    Builds the article. With a checkpoint, each stage's result is saved as soon as it
+    completes and stages already saved by an earlier attempt of the run are skipped.
+    """
+    checkpoint = checkpoint or RunCheckpoint(None)
+
+    def collect_documents() -> Dict:
+        # month, week, day, hour.
+        documents = generate_perplexity_responses(query, 10)
+        return {"documents": documents, "seen": seen_index.pending()}
+
+    sources = checkpoint.run_stage("sources", collect_documents)
+    seen_index.restore(sources["seen"])
+
+    def build_report() -> Dict:
+        perplexity_responses = sources["documents"]
+        if DEDUPE_REPORT:
+            # The report is sent once per candidate, so every duplicate story costs 8x.
+            perplexity_responses = dedupe_documents(perplexity_responses, index=story_index, unit_filter=is_new_story)
+        report = ""
+        sections = {name: [] for name in SECTIONS}
+        for perplexity_response in perplexity_responses:
+            report += f"\n```Article\n{perplexity_response}\n```\n"
+            sections[section_for(perplexity_response)].append(perplexity_response)
+        return {"report": report, "sections": sections, "seen": seen_index.pending()}
+
+    report = checkpoint.run_stage("report", build_report)
+    seen_index.restore(report["seen"])
+    if GENERATION_MODE == "sections":
+        generate = lambda: generate_section_answers(report["sections"], 8, checkpoint=checkpoint)
+    elif GENERATION_MODE == "whole":
+        generate = lambda: generate_initial_answers(report["report"], 8)
+    else:
+        raise ValueError(f"Unknown generation mode: {GENERATION_MODE}")
+    initial_answers = checkpoint.run_stage("candidates", generate)
+    return checkpoint.run_stage("best", lambda: select_best_answer(initial_answers, checkpoint=checkpoint))
+
+def select_best_answer(answers: List[str], mode: str = RANKING_MODE, checkpoint: Optional[RunCheckpoint] = None) -> str:
+    if mode == "pointwise":
+        return rank_answers_pointwise(answers)
+    if mode == "tournament":
+        return rank_answers(answers, checkpoint=checkpoint)
+    raise ValueError(f"Unknown ranking mode: {mode}")
+
+@metrics.timed_stage()
+def get_linkedin_posts(seen: Optional[List[List[str]]] = None, stop: Optional[threading.Event] = None) -> str:
+    """
+    Scrapes the LinkedIn feed and keeps the relevant posts that were never published.
+    The kept posts are appended to seen as [kind, key] pairs, for the caller to stage
+    once it actually uses them. Setting stop ends scrolling early.
+    """
+    ls = LinkedInScraper(
+        adaptive=LINKEDIN_ADAPTIVE_SCROLL,
+        max_posts=LINKEDIN_MAX_POSTS,
+        time_budget=LINKEDIN_TIME_BUDGET,
+        keep_alive=LINKEDIN_KEEP_ALIVE,
+        headless=LINKEDIN_LEAN_PROFILE,
+        block_resources=LINKEDIN_LEAN_PROFILE,
+    )
+    def unpublished_posts():
+        for post in ls.iter_posts(stop=stop):
+            if SKIP_PUBLISHED and seen_index.is_published(POST, post_hash(post)):
+                continue
+            yield post
+
+    # Posts are scored as they stream in; only borderline ones reach the LLM.
+    posts = filter_posts(unpublished_posts(), lambda prompt: call_openai(prompt, priority=PRIORITY_SUMMARY))
+    if seen is not None:
+        seen.extend([POST, post_hash(post)] for post in posts)
+    return "\n".join(posts)
+
+def post_hash(post: str) -> str:
+    return hashlib.sha256(post.strip().encode()).hexdigest()
+
+def is_new_story(unit) -> bool:
+    """
+    Decides whether a deduplicated story unit should go into the report, and stages
+    its citation URLs for the seen index if it does.
+
+    Only news stories are matched on their URLs. Papers and LinkedIn posts are
+    tracked by arXiv ID and post hash, and their links (code, datasets, articles)
+    often point at pages a news story already cited.
+    """
+    if not unit.header.startswith("News Article"):
+        return True
+    if SKIP_PUBLISHED and unit.citations:
+        published = [url for url in unit.citations if seen_index.is_published(URL, url)]
+        covered_share = 1.0 if ALLOW_FOLLOWUPS else COVERED_CITATION_SHARE
+        if published and len(published) >= covered_share * len(unit.citations):
+            return False
+    seen_index.stage(URL, unit.citations)
+    return True
+
+def estimate_tokens(text: str) -> int:
+    # Rough estimate of about 4 characters per token, good enough for budgeting.
+    return len(text) // 4
+
+def split_markdown_chunks(markdown: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> List[str]:
+    """
+    Splits markdown on section headings and packs consecutive sections into chunks
+    of at most max_tokens. Sections that are too long on their own are split by lines.
+    """
+    sections = [section for section in re.split(r'(?m)^(?=#{1,6}\s)', markdown) if section.strip()]
+    pieces = []
+    for section in sections:
+        if estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+            continue
+        piece = ""
+        max_chars = max_tokens * 4
+        lines = [
+            line[i:i + max_chars]
+            for line in section.splitlines(keepends=True)
+            for i in range(0, len(line), max_chars)
+        ]
+        for line in lines:
+            if piece and estimate_tokens(piece + line) > max_tokens:
+                pieces.append(piece)
+                piece = ""
+            piece += line
+        if piece:
+            pieces.append(piece)
+
+    chunks = []
+    chunk = ""
+    for piece in pieces:
+        if chunk and estimate_tokens(chunk + piece) > max_tokens:
+            chunks.append(chunk)
+            chunk = ""
+        chunk += piece
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def summarize_document(markdown: str, max_tokens: int = SUMMARY_CHUNK_TOKENS) -> Optional[str]:
+    """
+    Summarizes a document with a map-reduce over its section chunks.
+
+    Short documents are summarized in one call. Longer ones have every chunk
+    summarized in parallel and the partial summaries merged by a reduce call. Chunk
+    summaries go through the response cache, so a retry after a failure only redoes
+    the chunks that failed.
+
+    Returns:
+        Optional[str]: The summary, or None if any call failed.
+    """
+    chunks = split_markdown_chunks(markdown, max_tokens)
+    if len(chunks) <= 1:
+        summary = call_openai(f"Gently summarize this without missing any detail.\n\n{markdown}", priority=PRIORITY_SUMMARY)
+        return None if summary.startswith("Error calling LLM") else summary
+
+    print(f"Summarizing {len(chunks)} chunks in parallel...")
+    partials = list(scheduler.map(
+        lambda chunk: call_openai(f"Gently summarize this part of a research paper without missing any detail.\n\n{chunk}", priority=PRIORITY_SUMMARY),
+        chunks,
+    ))
+    failed = sum(1 for partial in partials if partial.startswith("Error calling LLM"))
+    if failed:
+        logging.error(f"{failed} of {len(chunks)} chunk summaries failed.")
+        return None
+
+    merged = "\n\n".join(f"```Part {i + 1}\n{partial}\n```" for i, partial in enumerate(partials))
+    if estimate_tokens(merged) > max_tokens and len(merged) < len(markdown):
+        # Partial summaries still too long for one prompt: reduce them recursively.
+        return summarize_document(merged, max_tokens)
+    summary = call_openai(f"Merge these partial summaries of one research paper into a single summary without missing any detail.\n\n{merged}", priority=PRIORITY_SUMMARY)
+    return None if summary.startswith("Error calling LLM") else summary
+
+def summarize_paper(paper_id: str, date_str: str) -> str:
+    arxiv_pdf_url = f"https://arxiv.org/pdf/{paper_id}"
+
+    hash_url = hashlib.sha256(arxiv_pdf_url.encode()).hexdigest()
+    summary = response_cache.get("paper_summary", hash_url)
+
+    if summary is not None:
+        print(f"Fetching Cache {arxiv_pdf_url}...")
+    else:
+        print(f"Fetching Realtime {arxiv_pdf_url}...")
+        try:
+            response = call_firecrawl_scrape(retrieve_url=arxiv_pdf_url)
+        except ProviderError as e:
+            logging.error(f"Failed to scrape {arxiv_pdf_url}: {e}. Skipping it.")
+            return ""
+        print(f"Summarizing {arxiv_pdf_url}...")
+        summary = summarize_document(response)
+        if summary is None:
+            logging.error(f"Failed to summarize {arxiv_pdf_url}. Skipping it.")
+            return ""
+        summary = f"Arxiv Research Paper Posted {date_str}\n\n{summary}"
+        response_cache.put("paper_summary", hash_url, summary, model="o1-mini")
+
+    print(summary)
+    return summary
+
+def fetch_paper_listing(day: date) -> List[str]:
+    """
+    Returns the unique arXiv IDs listed on the Hugging Face papers page for a day.
+
+    Listings for past days no longer change, so they are cached without expiry. The
+    listing for today is always fetched fresh.
+    """
+    date_str = day.strftime('%Y-%m-%d')
+    url = f"https://huggingface.co/papers?date={date_str}"
+    is_past = day < date.today()
+    cache_key = ResponseCache.make_key("hf_listing", "", url)
+    if is_past:
+        cached = response_cache.get("hf_listing", cache_key)
+        if cached is not None:
+            print(f"Fetching Cache {date_str} listing...")
+            return json.loads(cached)
+
+    print(f"Fetching {date_str}...")
+    response = call_firecrawl_scrape(retrieve_url=url, cache=False)
+    pattern = r'https?://huggingface\.co/papers/(\d+\.\d+)'
+    # Unique
+    paper_ids = list(dict.fromkeys(re.findall(pattern, response)))
+    if is_past and paper_ids:
+        response_cache.put("hf_listing", cache_key, json.dumps(paper_ids))
+    return paper_ids
+
+@metrics.timed_stage()
+def get_huggingface_papers(
+    days_in_past: int,
+    concurrency: int = PAPER_CONCURRENCY,
+    seen: Optional[List[List[str]]] = None,
+    stop: Optional[threading.Event] = None,
+) -> List[str]:
+    """
+    Collects the papers listed on Hugging Face for the last days_in_past days and
+    summarizes them with a pool of concurrency workers. Pacing toward Firecrawl and
+    OpenAI is left to the scheduler.
+
+    All day listings are fetched concurrently and paper IDs are deduplicated across
+    days before any PDF is scraped, so a multi-day backfill costs about one listing
+    round-trip plus the unique papers. A paper listed on several days is attributed
+    to the most recent one.
+
+    The IDs of the summarized papers are appended to seen as [kind, key] pairs, for
+    the caller to stage once it actually uses the summaries. Setting stop drops the
+    papers not summarized yet and returns the ones that are.
+    """
     results = []
-    base_url = "https://huggingface.co/papers"
     today = date.today()
-    for offset in range(0,days_in_past):
-        date_str = (today - timedelta(days=offset)).strftime('%Y-%m-%d')
-        url = f"{base_url}?date={date_str}"
-        print(f"Fetching {date_str}...")
-        try:
-            response = call_firecrawl_scrape(retrieve_url=url)
-            pattern = r'https?://huggingface\.co/papers/(\d+\.\d+)'
-            paper_ids = re.findall(pattern, response)
-            # Unique
-            paper_ids = list(dict.fromkeys(paper_ids))
-            for paper_id in paper_ids:
-                arxiv_pdf_url = f"https://arxiv.org/pdf/{paper_id}"
-                
-                if not os.path.exists(CACHE_DIR):
-                    os.makedirs(CACHE_DIR)
-
-                hash_url = hashlib.sha256(arxiv_pdf_url.encode()).hexdigest()
-                cache_path = os.path.join(CACHE_DIR, hash_url)
-                
-                if os.path.isfile(cache_path):
-                    print(f"Fetching Cache {arxiv_pdf_url}...")
-                    with open(cache_path, 'r') as f:
-                        summary = f.readlines()
-                else:
-                    print(f"Fetching Realtime {arxiv_pdf_url}...")
-                    response = call_firecrawl_scrape(retrieve_url=arxiv_pdf_url)
-                    print(f"Summarizing {arxiv_pdf_url}...")
-                    summary = call_openai(f"Gently summarize this without missing any detail.\n\n{response}")
-                    summary = f"Arxiv Research Paper Posted {date_str}\n\n{summary}"
-                    with open(cache_path, 'w') as f:
-                        f.write(summary)
-                    wait_time = random.uniform(5, 10)
-                    print(f"Waiting {wait_time} ...")
-                    time.sleep(wait_time)
-
-                print(summary)
-                results.append(summary)
+    days = [today - timedelta(days=offset) for offset in range(0, days_in_past)]
 
-        except requests.RequestException as e:
+    listings = {}
+    futures = {scheduler.submit(fetch_paper_listing, day): day for day in days}
+    for future in concurrent.futures.as_completed(futures):
+        day = futures[future]
+        try:
+            listings[day] = future.result()
+        except ProviderError as e:
             print(f"Error: {e}")
+
+    paper_dates = {}
+    for day in days:
+        for paper_id in listings.get(day, []):
+            paper_dates.setdefault(paper_id, day.strftime('%Y-%m-%d'))
+    paper_ids = list(paper_dates)
+    print(f"Found {len(paper_ids)} unique papers over {len(days)} days.")
+
+    if SKIP_PUBLISHED:
+        new_ids = seen_index.filter_new(ARXIV, paper_ids)
+        print(f"Skipping {len(paper_ids) - len(new_ids)} already published papers.")
+        paper_ids = new_ids
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        futures = [executor.submit(summarize_paper, paper_id, paper_dates[paper_id]) for paper_id in paper_ids]
+        pending = set(futures)
+        while pending and not (stop is not None and stop.is_set()):
+            _, pending = concurrent.futures.wait(
+                pending,
+                timeout=SOURCE_STOP_POLL_SECONDS if stop is not None else None,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+        if pending:
+            print(f"Stopped with {len(pending)} of {len(futures)} papers not summarized.")
+    finally:
+        # Papers that haven't started yet are dropped once the caller stops waiting
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Keep the listing order in the results
+    for paper_id, future in zip(paper_ids, futures):
+        if future in pending:
+            continue
+        summary = future.result()
+        if summary:
+            results.append(summary)
+            if seen is not None:
+                seen.append([ARXIV, paper_id])
     return results
 
-def generate_perplexity_responses(query: str, n: int) -> List[str]:
-    perplexity_responses = []
-    hf_papers = get_huggingface_papers(days_in_past=1)
-    perplexity_responses.append(hf_papers)
-    linkedin_content = get_linkedin_posts()
-    perplexity_responses.append(linkedin_content)
+def stream_perplexity_answer(query: str, recency: str = "day", stop: Optional[threading.Event] = None) -> str:
+    """
+    Streams one Perplexity answer and adds it to the story index as soon as it is
+    complete, while the other answers of the fan-out are still streaming.
+
+    Raises:
+        concurrent.futures.CancelledError: If stop is set before the answer is complete.
+    """
+    start = time.monotonic()
+    parts = []
+    stream = stream_perplexity(query, recency)
+    try:
+        for i, text in enumerate(stream):
+            if stop is not None and stop.is_set():
+                raise concurrent.futures.CancelledError()
+            if i == 0:
+                print(f"First Perplexity tokens after {time.monotonic() - start:.1f}s")
+            parts.append(text)
+    finally:
+        stream.close()
+    answer = "".join(parts)
+    date_str = date.today().strftime('%Y-%m-%d')
+    story_index.add_document(f"News Article Posted {date_str}\n\n{answer}")
+    return answer
+
+def hedge_delay(call_type: str) -> Optional[float]:
+    """
+    Returns how long a fan-out call of call_type may run before it gets a duplicate,
+    or None when hedging is off. Only calls of the same type count, so e.g. short
+    summary calls to the same model don't lower the delay for generation calls.
+    """
+    if not HEDGE_REQUESTS:
+        return None
+    delay = metrics.fan_out_percentile(call_type, HEDGE_PERCENTILE, min_samples=HEDGE_MIN_SAMPLES)
+    return delay if delay is not None else HEDGE_DEFAULT_DELAYS.get(call_type)
+
+def report_coverage(coverage: CitationCoverage, max_samples: int) -> None:
+    """
+    Records how many unique citation URLs the Perplexity answers covered against the
+    requests and spend it took, in perplexity_coverage and on stdout.
+    """
+    stats = coverage.stats()
+    run = metrics.to_dict()
+    requests_made = sum(call["count"] for call in run["calls"] if call["provider"] == "perplexity")
+    cost = run["usage"].get("sonar-pro", {}).get("cost_usd", 0.0)
+    stats.update(
+        max_samples=max_samples,
+        requests=requests_made,
+        cost_usd=cost,
+        cost_per_unique_url=round(cost / stats["unique_urls"], 6) if stats["unique_urls"] else None,
+    )
+    perplexity_coverage.clear()
+    perplexity_coverage.update(stats)
+    print(
+        f"Perplexity coverage: {stats['unique_urls']} unique citation URLs from {stats['samples']} answers "
+        f"({requests_made} requests, ${cost:.4f}); new URLs per answer: {stats['new_urls_per_sample']}."
+    )
+
+def fetch_perplexity_answers(
+    query: str,
+    n: int,
+    quorum: int = PERPLEXITY_QUORUM,
+    deadline: float = PERPLEXITY_DEADLINE,
+    stop: Optional[threading.Event] = None,
+) -> List[str]:
+    """
+    Fans out n Perplexity requests for query and returns the answers that came back
+    within the quorum and deadline. Setting stop starts no further requests once the
+    next answer arrives.
+    """
     print("Generating perplexity responses in parallel...")
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(call_perplexity, query, "day") for _ in range(n)]
-        for i, future in enumerate(concurrent.futures.as_completed(futures)):
-            answer = future.result()
-            date_str = date.today().strftime('%Y-%m-%d')
-            answer = f"News Article Posted {date_str}\n\n{answer}"
-            perplexity_responses.append(answer)
-            print(f"Generated preplexity response {i + 1}")
+    if STREAM_PERPLEXITY:
+        task = lambda stop: stream_perplexity_answer(query, "day", stop=stop)
+    else:
+        task = lambda stop: call_perplexity(query, "day", cache=False)
+    coverage = CitationCoverage(min_new=PERPLEXITY_MIN_NEW_CITATIONS, patience=PERPLEXITY_PATIENCE)
+
+    def stop_when(answer: str) -> bool:
+        if stop is not None and stop.is_set():
+            return True
+        if not ADAPTIVE_PERPLEXITY:
+            return False
+        new = coverage.add(answer)
+        print(f"Perplexity answer added {new} new citation URLs ({len(coverage.seen)} unique).")
+        return coverage.saturated()
+
+    results = gather_quorum(
+        task,
+        n,
+        quorum=quorum,
+        deadline=deadline,
+        hedge_after=hedge_delay("perplexity_answer"),
+        label="Perplexity fan-out",
+        submit=scheduler.submit,
+        watch_start=scheduler.on_admit,
+        can_hedge=lambda: scheduler.has_capacity("perplexity"),
+        max_in_flight=PERPLEXITY_IN_FLIGHT if ADAPTIVE_PERPLEXITY else None,
+        stop_when=stop_when,
+        observe=lambda seconds: metrics.observe_fan_out_call("perplexity_answer", seconds),
+    )
+    report_coverage(coverage, n)
+    answers = []
+    date_str = date.today().strftime('%Y-%m-%d')
+    for i, answer in enumerate(results):
+        answer = f"News Article Posted {date_str}\n\n{answer}"
+        answers.append(answer)
+        print(f"Generated preplexity response {i + 1}")
+    return answers
+
+def collect_sources(query: str, n: int, deadline: float = SOURCE_DEADLINE, timeouts: Optional[Dict[str, float]] = None) -> Dict[str, List[str]]:
+    """
+    Runs the Hugging Face/arXiv, LinkedIn and Perplexity collectors at the same time.
+
+    Each source gets its own time budget (SOURCE_TIMEOUTS, capped by deadline, both
+    measured from the start of collection). A source that fails or runs out of time
+    contributes an empty list, so the report is built from whatever finished.
+
+    Items for the seen index are only staged for sources that finished in time; a
+    straggler's items never reach the index. A source that runs out of time is told
+    to stop, so it winds down instead of running on in the background.
+    """
+    timeouts = {**SOURCE_TIMEOUTS, **(timeouts or {})}
+    collectors = {
+        "huggingface": lambda seen, stop: get_huggingface_papers(days_in_past=HF_DAYS_IN_PAST, seen=seen, stop=stop),
+        "linkedin": lambda seen, stop: [get_linkedin_posts(seen=seen, stop=stop)],
+        "perplexity": lambda seen, stop: fetch_perplexity_answers(query, n, stop=stop),
+    }
+    results = {name: [] for name in collectors}
+    seen = {name: [] for name in collectors}
+    stops = {name: threading.Event() for name in collectors}
+    start = time.monotonic()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=len(collectors))
+    try:
+        futures = {name: executor.submit(collector, seen[name], stops[name]) for name, collector in collectors.items()}
+        for name, future in futures.items():
+            remaining = min(timeouts.get(name, deadline), deadline) - (time.monotonic() - start)
+            try:
+                results[name] = future.result(timeout=max(remaining, 0))
+                seen_index.restore(seen[name])
+                print(f"Source {name} finished with {len(results[name])} items.")
+            except concurrent.futures.TimeoutError:
+                logging.warning(f"Source {name} did not finish within its time budget. Skipping it.")
+                stops[name].set()
+            except (Exception, SystemExit) as e:
+                # The LinkedIn scraper exits when Chrome or its profile is missing
+                logging.error(f"Source {name} failed: {e!r}")
+    finally:
+        # Don't block on stragglers; their results are simply not used.
+        for stop in stops.values():
+            stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+@metrics.timed_stage()
+def generate_perplexity_responses(query: str, n: int, deadline: float = SOURCE_DEADLINE) -> List[str]:
+    sources = collect_sources(query, n, deadline=deadline)
+    perplexity_responses = []
+    perplexity_responses.extend(sources["huggingface"])
+    perplexity_responses.extend(sources["linkedin"])
+    perplexity_responses.extend(sources["perplexity"])
     print(f"Generated {len(perplexity_responses)} answers.\n")
     return perplexity_responses
 
-def generate_initial_answers(report: str, n: int) -> List[str]:
+@metrics.timed_stage()
+def generate_initial_answers(report: str, n: int, quorum: int = ANSWER_QUORUM, deadline: float = ANSWER_DEADLINE) -> List[str]:
     initial_answers = []
     prompt = f"""
     Today is {get_current_datetime()}.
@@ -155,18 +693,150 @@ def generate_initial_answers(report: str, n: int) -> List[str]:
     ```
     """
     print("Generating initial answers in parallel...")
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        futures = [executor.submit(call_openai, prompt) for _ in range(n)]
-        for i, future in enumerate(concurrent.futures.as_completed(futures)):
-            answer = future.result()
-            initial_answers.append(answer)
-            print(f"Generated answer {i + 1}")
+    results = gather_quorum(
+        lambda stop: call_openai(prompt, cache=False),
+        n,
+        quorum=quorum,
+        deadline=deadline,
+        hedge_after=hedge_delay("candidate"),
+        label="Candidate fan-out",
+        submit=scheduler.submit,
+        watch_start=scheduler.on_admit,
+        can_hedge=lambda: scheduler.has_capacity("openai", "o1-mini"),
+        observe=lambda seconds: metrics.observe_fan_out_call("candidate", seconds),
+    )
+    if not results:
+        raise RuntimeError("No candidate answers were generated before the deadline.")
+    for i, answer in enumerate(results):
+        initial_answers.append(answer)
+        print(f"Generated answer {i + 1}")
     print(f"Generated {len(initial_answers)} answers.\n")
     return initial_answers
 
-def rank_answers(initial_answers: List[str]) -> str:
-    round_number = 1
-    current_round = initial_answers.copy()
+def section_for(document: str) -> str:
+    """
+    Returns the newsletter section a source document or story unit belongs to.
+    """
+    if document.startswith("Arxiv Research Paper"):
+        return "Arxiv Papers"
+    if document.startswith(("LinkedIn Post", "```LinkedIn Post")):
+        return "LinkedIn Buzz"
+    return "News Stories"
+
+def normalize_section(name: str, text: str) -> str:
+    """
+    Makes a generated section start with its own ## heading, dropping a document
+    title the model may have added anyway.
+    """
+    text = re.sub(r'^#\s+.*\n*', '', text.strip()).strip()
+    if re.match(r'##\s', text):
+        text = text.split("\n", 1)[1].strip() if "\n" in text else ""
+    return f"## {name}\n\n{text}"
+
+def generate_section(name: str, units: List[str], n: int, quorum: int = ANSWER_QUORUM, deadline: float = ANSWER_DEADLINE) -> List[str]:
+    """
+    Writes n drafts of one newsletter section from only that section's stories.
+    A draft whose call fails is tried again, for SECTION_ATTEMPTS attempts in total.
+
+    Raises:
+        RuntimeError: If no draft could be written.
+    """
+    context = "".join(f"\n```Article\n{unit}\n```\n" for unit in units)
+    prompt = f"""
+    Today is {get_current_datetime()}.
+
+    Given the Context below, write the {name} section of today's AI newsletter. Response will start with '## {name}' and contain nothing else. Every {SECTIONS[name]} in the Context gets its own ### tag with its content, without missing any detail, cite all sources as links [Read more](<citation source>). Response should not use numbering.
+    
+    ```Context
+    {context}
+    ```
+    """
+
+    def draft(stop: threading.Event) -> str:
+        for attempt in range(1, SECTION_ATTEMPTS + 1):
+            response = call_openai(prompt, cache=False)
+            if not response.startswith("Error calling LLM"):
+                return normalize_section(name, response)
+            logging.warning(f"{name} draft attempt {attempt} failed: {response}")
+        raise RuntimeError(f"{name} draft failed after {SECTION_ATTEMPTS} attempts.")
+
+    drafts = gather_quorum(
+        draft,
+        n,
+        quorum=quorum,
+        deadline=deadline,
+        hedge_after=hedge_delay("section_draft"),
+        label=f"{name} fan-out",
+        submit=scheduler.submit,
+        watch_start=scheduler.on_admit,
+        can_hedge=lambda: scheduler.has_capacity("openai", "o1-mini"),
+        observe=lambda seconds: metrics.observe_fan_out_call("section_draft", seconds),
+    )
+    if not drafts:
+        raise RuntimeError(f"No drafts of the {name} section were generated.")
+    return drafts
+
+@metrics.timed_stage()
+def generate_section_answers(sections: Dict[str, List[str]], n: int, checkpoint: Optional[RunCheckpoint] = None) -> List[str]:
+    """
+    Writes n candidate documents section by section. All sections are drafted in
+    parallel and candidate i is the title followed by draft i of every section;
+    sections without stories are left out.
+
+    With a checkpoint, each section's drafts are saved as soon as they are done, so
+    resuming after a failure only regenerates the sections that failed.
+    """
+    checkpoint = checkpoint or RunCheckpoint(None)
+    names = [name for name in SECTIONS if sections.get(name)]
+    if not names:
+        raise RuntimeError("The report has no stories to write about.")
+
+    def write(name: str) -> List[str]:
+        stage = "section-" + name.lower().replace(" ", "-")
+        return checkpoint.run_stage(stage, lambda: generate_section(name, sections[name], n))
+
+    print(f"Generating {', '.join(names)} in parallel...")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(names)) as executor:
+        futures = {name: executor.submit(write, name) for name in names}
+    drafts = {name: future.result() for name, future in futures.items()}
+
+    title = f"# AI News for {date.today().strftime('%m-%d-%Y')}"
+    count = max(len(section_drafts) for section_drafts in drafts.values())
+    answers = []
+    for i in range(count):
+        # Sections with fewer drafts reuse theirs, so every candidate is complete
+        parts = [title] + [drafts[name][i % len(drafts[name])] for name in names]
+        answers.append("\n\n".join(parts))
+    print(f"Assembled {len(answers)} answers from {len(names)} sections.\n")
+    return answers
+
+@metrics.timed_stage()
+def rank_answers(initial_answers: List[str], checkpoint: Optional[RunCheckpoint] = None) -> str:
+    """
+    Runs a single-elimination tournament over the answers. All comparisons of a
+    round are independent, so they are judged concurrently through the scheduler;
+    the bracket is the same as when judging them one by one.
+
+    With a checkpoint, the bracket and every verdict are saved as they are decided,
+    and a resumed run continues from the last saved verdict.
+    """
+    checkpoint = checkpoint or RunCheckpoint(None)
+    if checkpoint.has("tournament"):
+        state = checkpoint.load("tournament")
+        print(f"Resuming tournament at Round {state['round_number']} with {len(state['current_round'])} competitors.")
+    else:
+        state = {"round_number": 1, "current_round": initial_answers.copy(), "verdicts": {}}
+    round_number = state["round_number"]
+    current_round = state["current_round"]
+    # Verdicts of the current round decided so far, keyed by pair index
+    verdicts = state["verdicts"]
+    lock = threading.Lock()
+
+    def judge(i: int, pair: Tuple[str, str]) -> None:
+        result = compare_answers(*pair)
+        with lock:
+            verdicts[str(i)] = result
+            checkpoint.save("tournament", {"round_number": round_number, "current_round": current_round, "verdicts": verdicts})
     
     while len(current_round) > 1:
         print(f"Starting Round {round_number} with {len(current_round)} competitors.")
@@ -177,13 +847,20 @@ def rank_answers(initial_answers: List[str]) -> str:
             # If odd, automatically advance the last answer to the next round
             print("Odd number of answers. Automatically advancing the last answer to the next round.")
             next_round.append(current_round[-1])
-            current_round = current_round[:-1]
+            competitors = current_round[:-1]
+        else:
+            competitors = current_round
         
-        for i in range(0, len(current_round), 2):
-            a = current_round[i]
-            b = current_round[i + 1]
-            print(f"Comparing Answer {i + 1} vs. Answer {i + 2}...")
-            result = compare_answers(a, b)
+        pairs = [(competitors[i], competitors[i + 1]) for i in range(0, len(competitors), 2)]
+        for i in range(len(pairs)):
+            print(f"Comparing Answer {2 * i + 1} vs. Answer {2 * i + 2}...")
+        futures = [scheduler.submit(judge, i, pair) for i, pair in enumerate(pairs) if str(i) not in verdicts]
+        for future in futures:
+            future.result()
+        # Read back in pair order, which keeps the bracket stable
+        results = [verdicts[str(i)] for i in range(len(pairs))]
+
+        for (a, b), result in zip(pairs, results):
             if result == 'A':
                 print("Answer A wins the comparison.\n")
                 next_round.append(a)
@@ -198,11 +875,68 @@ def rank_answers(initial_answers: List[str]) -> str:
         current_round = next_round
         print(f"Round {round_number} completed. {len(current_round)} answers advancing to the next round.\n")
         round_number += 1
+        verdicts = {}
+        checkpoint.save("tournament", {"round_number": round_number, "current_round": current_round, "verdicts": verdicts})
     
     best_answer = current_round[0]
     print("Tournament completed. Best answer selected.\n")
     return best_answer
 
+def score_answer(answer: str) -> float:
+    """
+    Scores a single answer against SCORING_RUBRIC with one judge call.
+
+    Returns:
+        float: The sum of the criterion scores, or 0.0 if the judge response can't be parsed.
+    """
+    criteria = "\n".join(f"- {name}: {description}" for name, description in SCORING_RUBRIC.items())
+    scoring_prompt = f"""
+Score the document below as an answer to the query "Today's AI News." Give each criterion an integer score from 0 to 10.
+
+{criteria}
+
+Respond only with a JSON object mapping each criterion name to its score.
+
+```Document
+{answer}
+```
+"""
+    response = call_openai(scoring_prompt, model="gpt-4o", priority=PRIORITY_JUDGE)
+    match = re.search(r'\{.*\}', response, re.DOTALL)
+    try:
+        scores = json.loads(match.group(0)) if match else {}
+        total = float(sum(float(scores.get(name, 0)) for name in SCORING_RUBRIC))
+    except (ValueError, TypeError, AttributeError):
+        logging.warning(f"Could not parse judge scores: {response}")
+        total = 0.0
+
+    print(f"\nLLM as judge scored: {total}")
+    return total
+
+@metrics.timed_stage()
+def rank_answers_pointwise(answers: List[str], tie_break: bool = True) -> str:
+    """
+    Scores every answer once, all in parallel, and returns the highest scoring one.
+    With tie_break, the top two are compared pairwise when their scores are equal.
+    """
+    if len(answers) == 1:
+        return answers[0]
+
+    print(f"Scoring {len(answers)} answers in parallel...")
+    scores = list(scheduler.map(score_answer, answers))
+
+    ranked = sorted(range(len(answers)), key=lambda i: scores[i], reverse=True)
+    best, runner_up = ranked[0], ranked[1]
+    print(f"Scores: {scores}")
+
+    if tie_break and scores[best] == scores[runner_up]:
+        print(f"Answers {best + 1} and {runner_up + 1} are tied. Comparing them pairwise...")
+        if compare_answers(answers[best], answers[runner_up]) == 'B':
+            best = runner_up
+
+    print(f"Answer {best + 1} selected with score {scores[best]}.\n")
+    return answers[best]
+
 def compare_answers(a, b):
     retval = 'A'
     comparison_prompt = f"""
@@ -216,7 +950,10 @@ Which is the best answer A or B with the most and best stories for answering the
 {b}
 ```
 """
-    response = call_openai(comparison_prompt, model="gpt-4o").strip().upper()
+    if STREAM_JUDGE:
+        response = read_verdict(comparison_prompt, model="gpt-4o", priority=PRIORITY_JUDGE)
+    else:
+        response = call_openai(comparison_prompt, model="gpt-4o", priority=PRIORITY_JUDGE).strip().upper()
 
     if 'B' in response or 'b' in response:
         retval = 'B'
@@ -224,15 +961,48 @@ Which is the best answer A or B with the most and best stories for answering the
     print(f"\nLLM as judge picked: {retval}")
     return retval
 
+def read_verdict(prompt: str, model: str = "gpt-4o", priority: int = PRIORITY_JUDGE) -> str:
+    """
+    Streams a judge response and stops reading as soon as it opens with a standalone
+    A or B verdict (VERDICT_PATTERN). Otherwise the whole response is read and left
+    to the caller, like a call_openai response. Either way it is cached like
+    call_openai responses.
+
+    Returns:
+        str: The verdict letter, the full uppercased response if it didn't open with
+        one, or an empty string on error.
+    """
+    cache_key = ResponseCache.make_key("openai", model, {"prompt": prompt, "messages": None})
+    cached = response_cache.get("openai", cache_key)
+    if cached is not None:
+        return cached.strip().upper()
+
+    response = ""
+    stream = stream_openai(prompt, model=model, priority=priority)
+    try:
+        for text in stream:
+            response += text
+            match = VERDICT_PATTERN.match(response.upper())
+            if match:
+                verdict = match.group(1)
+                response_cache.put("openai", cache_key, verdict, model=model)
+                return verdict
+    except Exception as e:
+        logging.error(f"Error streaming LLM model='{model}': {e}")
+        return ""
+    finally:
+        # Closing the generator closes the HTTP stream, so no more tokens are generated.
+        stream.close()
+    # The full response, as call_openai would have cached it
+    response_cache.put("openai", cache_key, response, model=model)
+    return response.strip().upper()
+
 def get_current_datetime() -> str:
     now = datetime.now()
     formatted_time = now.strftime("%A, %B %d, %Y, %H:%M:%S")
     return f"Current date and time: {formatted_time}"
 
-def call_openai(prompt: str, model: str = "o1-mini", messages: Optional[List[Dict[str, str]]] = None) -> str:
-    """
-    Calls LLM for advanced reasoning or sub-queries.
-    """
+def build_messages(prompt: str, messages: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
     helper_messages = []
 
     if messages is None:
@@ -243,23 +1013,92 @@ def call_openai(prompt: str, model: str = "o1-mini", messages: Optional[List[Dic
         helper_messages = messages.copy()
         # Append the user message if messages were provided
         helper_messages.append({'role': 'user', 'content': prompt})
-    
-    try:
-        completion = client.chat.completions.create(
+    return helper_messages
+
+def stream_openai(prompt: str, model: str = "o1-mini", messages: Optional[List[Dict[str, str]]] = None, priority: int = PRIORITY_GENERATION) -> Iterator[str]:
+    """
+    Streams a chat completion and yields the text as it arrives.
+    Closing the generator early closes the underlying HTTP stream.
+    The scheduler slot is held until the stream is done.
+    """
+    helper_messages = build_messages(prompt, messages)
+    with scheduler.slot("openai", model, priority, tokens=estimate_tokens(json.dumps(helper_messages))):
+        start = time.monotonic()
+        stream = client.chat.completions.create(
             model=model,
-            messages=helper_messages
+            messages=helper_messages,
+            stream=True,
+            stream_options={"include_usage": True}
         )
+        usage = None
+        chunks = 0
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks += 1
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+            metrics.observe_call("openai", model, time.monotonic() - start)
+            if usage:
+                metrics.record_usage(model, usage.prompt_tokens, usage.completion_tokens)
+            else:
+                # Closed before the usage chunk arrived: estimate from what was sent and read.
+                metrics.record_usage(model, estimate_tokens(json.dumps(helper_messages)), chunks)
+
+def call_openai(prompt: str, model: str = "o1-mini", messages: Optional[List[Dict[str, str]]] = None, cache: bool = True, priority: int = PRIORITY_GENERATION) -> str:
+    """
+    Calls LLM for advanced reasoning or sub-queries.
+    Responses are cached unless cache is False. Cache misses go through the
+    scheduler in the given priority lane.
+    """
+    # The current datetime prefix is left out of the key so repeated runs can hit.
+    cache_key = ResponseCache.make_key("openai", model, {"prompt": prompt, "messages": messages})
+    if cache:
+        cached = response_cache.get("openai", cache_key)
+        if cached is not None:
+            return cached
+
+    helper_messages = build_messages(prompt, messages)
 
-        return completion.choices[0].message.content
+    start = time.monotonic()
+    try:
+        with scheduler.slot("openai", model, priority, tokens=estimate_tokens(json.dumps(helper_messages))):
+            start = time.monotonic()
+            completion = client.chat.completions.create(
+                model=model,
+                messages=helper_messages
+            )
+        metrics.observe_call("openai", model, time.monotonic() - start)
+        if completion.usage:
+            metrics.record_usage(model, completion.usage.prompt_tokens, completion.usage.completion_tokens)
+
+        retval = completion.choices[0].message.content
+        if cache:
+            response_cache.put("openai", cache_key, retval, model=model)
+        return retval
     except Exception as e:
+        metrics.observe_call("openai", model, time.monotonic() - start, error=True)
         return f"Error calling LLM model='{model}': {str(e)}"
 
-def call_perplexity(query: str, recency: str = "day") -> str:
+def call_perplexity(query: str, recency: str = "day", cache: bool = True) -> str:
     """
     Calls the Perplexity AI API with the given query.
     Returns the text content from the model’s answer.
+    Responses are cached unless cache is False.
+
+    Raises:
+        ProviderError: If the call fails after retries or the response is malformed.
     """
-    url = "https://api.perplexity.ai/chat/completions"
+    cache_key = ResponseCache.make_key("perplexity", "sonar-pro", {"query": query, "recency": recency})
+    if cache:
+        cached = response_cache.get("perplexity", cache_key)
+        if cached is not None:
+            return cached
+
+    url = PERPLEXITY_API_URL
     payload = {
         "model": "sonar-pro",
         "messages": [
@@ -274,20 +1113,81 @@ def call_perplexity(query: str, recency: str = "day") -> str:
         "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
         "Content-Type": "application/json",
     }
+    with scheduler.slot("perplexity", "sonar-pro", tokens=estimate_tokens(query)):
+        response = request_with_retry("perplexity", "POST", url, model="sonar-pro", headers=headers, json=payload, timeout=180)
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=180)
-        response.raise_for_status()
         data = response.json()
         retval = data["choices"][0]["message"]["content"]
-        citations_list = data.get("citations", [])
-        numbered_citations = "\n".join(f"{i + 1}. {citation}" for i, citation in enumerate(citations_list))
-        citations = f"\n\nCitations:\n{numbered_citations}"
-        retval = retval + citations
+    except (ValueError, KeyError, IndexError) as e:
+        raise ProviderError("perplexity", f"Malformed response: {e}") from e
+    usage = data.get("usage") or {}
+    metrics.record_usage("sonar-pro", usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+    citations_list = data.get("citations", [])
+    numbered_citations = "\n".join(f"{i + 1}. {citation}" for i, citation in enumerate(citations_list))
+    citations = f"\n\nCitations:\n{numbered_citations}"
+    retval = retval + citations
+    if cache:
+        response_cache.put("perplexity", cache_key, retval, model="sonar-pro")
 
-        print(f"* * *  Research Assistant Response  * * *\n\n{retval}\n\n")
-        return retval
-    except Exception as e:
-        return f"Error calling Perplexity API: {str(e)}"
+    print(f"* * *  Research Assistant Response  * * *\n\n{retval}\n\n")
+    return retval
+
+def stream_perplexity(query: str, recency: str = "day") -> Iterator[str]:
+    """
+    Streams a Perplexity answer and yields the text as it arrives, followed by the
+    same Citations block call_perplexity appends.
+
+    Raises:
+        ProviderError: If the call fails after retries.
+    """
+    url = PERPLEXITY_API_URL
+    payload = {
+        "model": "sonar-pro",
+        "messages": [
+            {"role": "user", "content": query},
+        ],
+        "temperature": 0.7,
+        "top_p": 0.9,
+        "search_recency_filter": recency,
+        "stream": True,
+    }
+    headers = {
+        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
+        "Content-Type": "application/json",
+    }
+    # The scheduler slot is held until the stream is done
+    with scheduler.slot("perplexity", "sonar-pro", tokens=estimate_tokens(query)):
+        response = request_with_retry("perplexity", "POST", url, model="sonar-pro", headers=headers, json=payload, timeout=180, stream=True)
+        citations_list = []
+        usage = {}
+        try:
+            # Server-sent events: one "data: {json}" line per chunk, "data: [DONE]" at the end.
+            # SSE is always UTF-8, but without a charset in the Content-Type requests would
+            # decode it as ISO-8859-1 and mangle non-ASCII text.
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except ValueError as e:
+                    raise ProviderError("perplexity", f"Malformed stream chunk: {e}") from e
+                citations_list = chunk.get("citations") or citations_list
+                usage = chunk.get("usage") or usage
+                choices = chunk.get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    yield text
+        except requests.RequestException as e:
+            raise ProviderError("perplexity", f"Stream interrupted: {e}") from e
+        finally:
+            response.close()
+            metrics.record_usage("sonar-pro", usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+    numbered_citations = "\n".join(f"{i + 1}. {citation}" for i, citation in enumerate(citations_list))
+    yield f"\n\nCitations:\n{numbered_citations}"
 
 def extract_title(markdown_content: str) -> str:
     """
@@ -315,76 +1215,75 @@ def construct_payload(title: str, content: str) -> Dict:
     }
     return payload
 
-def post_article(payload) -> None:
-    url = 'https://www.chrisclark.com/create_markdown_post.php'
+@metrics.timed_stage()
+def post_article(payload) -> Optional[Tuple[int, str]]:
+    """
+    Publishes the article with a single pooled HTTP request.
 
-    # Convert payload to JSON string
-    payload_json = json.dumps(payload)
+    The request carries an Idempotency-Key derived from the payload's content hash,
+    so the retries in request_with_retry can't publish the same article twice.
 
-    # Construct the curl command
-    curl_command = [
-        "curl",
-        "--location",
-        url,
-        "-H", "Content-Type: application/json",
-        "-d", payload_json
-    ]
+    Returns:
+        Optional[Tuple[int, str]]: The status code and response body, or None on failure.
+    """
+    payload_json = json.dumps(payload, sort_keys=True).encode("utf-8")
+    headers = {
+        "Content-Type": "application/json",
+        "Idempotency-Key": hashlib.sha256(payload_json).hexdigest(),
+    }
 
     try:
-        # Execute the curl command
-        result = subprocess.run(curl_command, capture_output=True, text=True)
-
-        # Check for errors
-        if result.returncode != 0:
-            logging.error(f"curl command failed with error: {result.stderr.strip()}")
-            return
-
-        # Print status code and response body
-        # To get the status code, you'll need to modify the curl command to include it
-        # One way is to use the -w flag to write out the HTTP status
-        # Here's an alternative approach:
-
-        # Reconstruct curl command to capture status code
-        curl_command_with_status = [
-            "curl",
-            "--location",
-            url,
-            "-H", "Content-Type: application/json",
-            "-d", payload_json,
-            "-w", "%{http_code}"
-        ]
-        result_with_status = subprocess.run(curl_command_with_status, capture_output=True, text=True)
-
-        if result_with_status.returncode != 0:
-            logging.error(f"curl command failed with error: {result_with_status.stderr.strip()}")
-            return
+        response = request_with_retry("publish", "POST", PUBLISH_URL, model="markdown_post", data=payload_json, headers=headers, timeout=60)
+    except ProviderError as e:
+        logging.error(f"Failed to publish article: {e}")
+        return None
 
-        response_body = result_with_status.stdout[:-3]  # Exclude the last 3 digits which are the status code
-        status_code = result_with_status.stdout[-3:]
+    print("Status Code:", response.status_code)
+    print("Response Body:", response.text)
+    return response.status_code, response.text
 
-        print("Status Code:", status_code)
-        print("Response Body:", response_body)
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Generate and publish the daily AI news article.")
+    parser.add_argument("--resume", metavar="RUN_ID", help=f"resume a failed run from its checkpoints in {RUNS_DIR}/RUN_ID")
+    args = parser.parse_args(argv)
 
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Failed to execute curl command: {e}")
-    except Exception as e:
-        logging.error(f"An unexpected error occurred: {e}")
-
-def main():
-
-    content = get_post("""Recent Today's News on Generative AI and Artificial Intelligence (AI) and Large Language Model (LLM). Note 3-4 facts from each story.""")
-    title = extract_title(content)
-
-    if not title:
-        logging.error("Title cannot be empty.")
-        sys.exit(1)
-    if not content:
-        logging.error("Content cannot be empty.")
+    run_id = args.resume or datetime.now().strftime('%Y%m%d-%H%M%S')
+    run_dir = os.path.join(RUNS_DIR, run_id)
+    checkpoint = RunCheckpoint(run_dir)
+    if args.resume and not checkpoint.exists():
+        logging.error(f"No run to resume in {run_dir}.")
         sys.exit(1)
+    if checkpoint.has("published"):
+        logging.info(f"Run {run_id} was already published, nothing to resume.")
+        return
+    migrated = response_cache.migrate_directory(CACHE_DIR)
+    if migrated:
+        logging.info(f"Migrated {migrated} legacy cache files into {response_cache.path}.")
+    try:
+        content = get_post("""Recent Today's News on Generative AI and Artificial Intelligence (AI) and Large Language Model (LLM). Note 3-4 facts from each story.""", checkpoint)
+        title = extract_title(content)
+
+        if not title:
+            logging.error("Title cannot be empty.")
+            sys.exit(1)
+        if not content:
+            logging.error("Content cannot be empty.")
+            sys.exit(1)
 
-    payload = construct_payload(title, content)
-    print(json.dumps(payload, indent=4))  # For debugging purposes
-    post_article(payload)
+        payload = construct_payload(title, content)
+        print(json.dumps(payload, indent=4))  # For debugging purposes
+        result = post_article(payload)
+        if result is not None:
+            checkpoint.save("published", {"status_code": result[0]})
+            # Everything that went into the report now counts as covered
+            count = seen_index.commit_published()
+            logging.info(f"Marked {count} items as published in {seen_index.path}.")
+    finally:
+        logging.info(f"Response cache: {json.dumps(response_cache.stats())}")
+        metrics.write_report(run_dir, extra={"run_id": run_id, "response_cache": response_cache.stats(), "perplexity_coverage": perplexity_coverage})
+        logging.info(f"Metrics written to {run_dir}")
+        if not checkpoint.has("published"):
+            logging.info(f"Resume this run with: python post_news.py --resume {run_id}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,351 @@
+"""
+Offline end-to-end benchmark for post_news.
+
+Starts local stand-in servers for the OpenAI chat completions, Perplexity, Firecrawl
+and publish endpoints plus a fixture LinkedIn feed page, points the pipeline at them
+and runs post_news.main(). Reports wall time, per-endpoint call counts, peak memory
+and the pipeline's own metrics, so runs can be compared before and after a change.
+
+Usage:
+    python post_news_bench.py --runs 3 --latency-scale 0.1 --error-rate 0.05 --output bench_output.txt
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+# Median latency in seconds and lognormal sigma per stub endpoint, before scaling.
+DEFAULT_LATENCIES = {
+    "openai": (8.0, 0.5),
+    "perplexity": (12.0, 0.6),
+    "firecrawl": (3.0, 0.5),
+    "publish": (0.5, 0.3),
+    "linkedin": (0.2, 0.2),
+}
+
+
+class StubConfig:
+    """
+    Behaviour of the stub servers: latency distribution, error rate and response size.
+    """
+
+    def __init__(
+        self,
+        latency_scale: float = 0.05,
+        error_rate: float = 0.0,
+        response_kb: int = 4,
+        paper_kb: int = 60,
+        papers: int = 20,
+        linkedin_posts: int = 60,
+        seed: Optional[int] = None,
+    ):
+        self.latencies = DEFAULT_LATENCIES
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.response_kb = response_kb
+        self.paper_kb = paper_kb
+        self.papers = papers
+        self.linkedin_posts = linkedin_posts
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def delay(self, endpoint: str) -> float:
+        median, sigma = self.latencies[endpoint]
+        with self.lock:
+            return median * self.latency_scale * self.random.lognormvariate(0, sigma)
+
+    def should_fail(self, endpoint: str) -> bool:
+        with self.lock:
+            self.calls[endpoint] += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors[endpoint] += 1
+            return failed
+
+    def filler(self, kb: int, prefix: str = "") -> str:
+        words = ["model", "agent", "benchmark", "reasoning", "token", "dataset", "inference", "context"]
+        with self.lock:
+            body = " ".join(self.random.choice(words) for _ in range(kb * 1024 // 8))
+        return prefix + body
+
+
+def make_handler(config: StubConfig):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: Any, content_type: str = "application/json", headers: Optional[Dict[str, str]] = None):
+            data = body if isinstance(body, bytes) else (json.dumps(body) if not isinstance(body, str) else body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_events(self, events):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for event in events + ["[DONE]"]:
+                data = f"data: {event if isinstance(event, str) else json.dumps(event)}\n\n".encode()
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _read_json(self) -> Dict[str, Any]:
+            length = int(self.headers.get("Content-Length", 0))
+            raw = self.rfile.read(length) if length else b"{}"
+            try:
+                return json.loads(raw)
+            except ValueError:
+                return {}
+
+        def _fail(self, endpoint: str) -> bool:
+            time.sleep(config.delay(endpoint))
+            if config.should_fail(endpoint):
+                status = config.random.choice([429, 500, 503])
+                self._send(status, {"error": "stub failure"}, headers={"Retry-After": "0"} if status == 429 else None)
+                return True
+            return False
+
+        def do_GET(self):
+            if self.path.startswith("/linkedin"):
+                if self._fail("linkedin"):
+                    return
+                posts = "".join(
+                    '<div class="update-components-text relative update-components-update-v2__commentary">'
+                    f"<span>{config.filler(1, f'Post {i} about large language models: ')}</span></div>"
+                    for i in range(config.linkedin_posts)
+                )
+                self._send(200, f"<html><body>{posts}</body></html>", content_type="text/html")
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            request = self._read_json()
+            if self.path.startswith("/openai"):
+                self._openai(request)
+            elif self.path.startswith("/perplexity"):
+                self._perplexity(request)
+            elif self.path.startswith("/firecrawl"):
+                self._firecrawl(request)
+            elif self.path.startswith("/publish"):
+                if not self._fail("publish"):
+                    self._send(200, {"status": "ok", "idempotency_key": self.headers.get("Idempotency-Key")})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def _openai_text(self, prompt: str) -> str:
+            if "Respond only A or B" in prompt:
+                return config.random.choice(["A", "B"])
+            if "Respond only with a JSON object" in prompt:
+                return json.dumps({"story_count": config.random.randint(0, 10), "citation_coverage": config.random.randint(0, 10), "section_correctness": config.random.randint(0, 10)})
+            if '"decision"' in prompt:
+                ids = re.findall(r'^\[(\d+)\]$', prompt, re.MULTILINE)
+                return json.dumps([{"id": int(i), "decision": config.random.choice(["keep", "drop"])} for i in ids])
+            return config.filler(config.response_kb, f"# AI News for {time.strftime('%m-%d-%Y')}\n\n## News Stories\n\n### Stub story\n\n")
+
+        def _openai(self, request: Dict[str, Any]):
+            if self._fail("openai"):
+                return
+            prompt = "\n".join(str(message.get("content", "")) for message in request.get("messages", []))
+            text = self._openai_text(prompt)
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(text) // 4, "total_tokens": (len(prompt) + len(text)) // 4}
+            base = {"id": "chatcmpl-stub", "created": int(time.time()), "model": request.get("model", "stub")}
+            if request.get("stream"):
+                pieces = [text[i:i + 200] for i in range(0, len(text), 200)]
+                events = [
+                    dict(base, object="chat.completion.chunk", choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                    for piece in pieces
+                ]
+                events.append(dict(base, object="chat.completion.chunk", choices=[], usage=usage))
+                self._send_events(events)
+            else:
+                self._send(200, dict(
+                    base,
+                    object="chat.completion",
+                    choices=[{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    usage=usage,
+                ))
+
+        def _perplexity(self, request: Dict[str, Any]):
+            if self._fail("perplexity"):
+                return
+            stories = []
+            citations = []
+            for i in range(5):
+                story = config.random.randint(0, 30)
+                stories.append(f"### Story {story}\n{config.filler(max(1, config.response_kb // 5), f'Story {story} details: ')} [{i + 1}]")
+                citations.append(f"https://news.example.com/story-{story}?utm_source=stub")
+            text = "\n\n".join(stories)
+            usage = {"prompt_tokens": 50, "completion_tokens": len(text) // 4}
+            if request.get("stream"):
+                pieces = [text[i:i + 200] for i in range(0, len(text), 200)]
+                self._send_events([
+                    {"choices": [{"delta": {"content": piece}}], "citations": citations, "usage": usage}
+                    for piece in pieces
+                ])
+            else:
+                self._send(200, {"choices": [{"message": {"content": text}}], "citations": citations, "usage": usage})
+
+        def _firecrawl(self, request: Dict[str, Any]):
+            if self._fail("firecrawl"):
+                return
+            url = request.get("url", "")
+            if "huggingface.co/papers" in url:
+                markdown = "\n".join(
+                    f"- [Paper {i}](https://huggingface.co/papers/2501.{10000 + i:05d})" for i in range(config.papers)
+                )
+            else:
+                sections = [f"## Section {i}\n\n{config.filler(max(1, config.paper_kb // 6))}" for i in range(6)]
+                markdown = f"# {url}\n\n" + "\n\n".join(sections)
+            self._send(200, {"success": True, "data": {"markdown": markdown}})
+
+    return StubHandler
+
+
+def start_stub_server(config: StubConfig) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def configure_environment(base_url: str) -> None:
+    """
+    Points every external endpoint at the stub server. Must run before post_news is imported.
+    """
+    os.environ["OPENAI_BASE_URL"] = f"{base_url}/openai/v1"
+    os.environ["OPENAI_API_KEY"] = "bench"
+    os.environ["PERPLEXITY_API_URL"] = f"{base_url}/perplexity/chat/completions"
+    os.environ["FIRECRAWL_API_URL"] = f"{base_url}/firecrawl/v1/scrape"
+    os.environ["PUBLISH_URL"] = f"{base_url}/publish"
+    os.environ["LINKEDIN_FEED_URL"] = f"{base_url}/linkedin/feed"
+
+
+def use_fixture_feed(post_news, feed_url: str) -> None:
+    """
+    Replaces the Chrome-driven LinkedIn scrape with a plain fetch of the fixture feed,
+    parsed with the same selector, for machines without a browser.
+    """
+    import requests
+    from bs4 import BeautifulSoup
+
+    def iter_posts(self, stop=None):
+        html = requests.get(feed_url, timeout=30).text
+        soup = BeautifulSoup(html, "html.parser")
+        for post in soup.find_all("div", class_="update-components-text relative update-components-update-v2__commentary"):
+            yield f"```LinkedIn Post\n\n{post.get_text(strip=True)}\n\n```\n\n"
+
+    post_news.LinkedInScraper.__init__ = lambda self, *args, **kwargs: None
+    post_news.LinkedInScraper.iter_posts = iter_posts
+
+
+def run_once(post_news, work_dir: str, warm_cache: bool) -> Dict[str, Any]:
+    post_news.metrics.reset()
+
+    cache_dir = os.path.join(work_dir, "cache")
+    post_news.CACHE_DIR = cache_dir
+    post_news.RUNS_DIR = os.path.join(work_dir, "runs")
+    # Every run starts from an empty seen index so runs stay comparable
+    post_news.seen_index = post_news.SeenIndex(os.path.join(work_dir, f"seen-{time.monotonic_ns()}.sqlite3"))
+    post_news.response_cache = post_news.ResponseCache(os.path.join(cache_dir, "cache.sqlite3"), enabled=warm_cache)
+
+    tracemalloc.start()
+    start = time.monotonic()
+    error = None
+    try:
+        post_news.main([])
+    except SystemExit as e:
+        error = f"SystemExit({e.code})"
+    except Exception as e:
+        error = repr(e)
+    wall = time.monotonic() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "wall_seconds": round(wall, 3),
+        "peak_python_mb": round(peak / 1024 / 1024, 2),
+        "error": error,
+        "metrics": post_news.metrics.to_dict(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for post_news.")
+    parser.add_argument("--runs", type=int, default=1, help="Number of pipeline runs.")
+    parser.add_argument("--latency-scale", type=float, default=0.05, help="Multiplier on the stub latency medians.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub responses that fail.")
+    parser.add_argument("--response-kb", type=int, default=4, help="Size of LLM and Perplexity responses.")
+    parser.add_argument("--paper-kb", type=int, default=60, help="Size of scraped paper markdown.")
+    parser.add_argument("--papers", type=int, default=20, help="Papers on the Hugging Face listing.")
+    parser.add_argument("--linkedin-posts", type=int, default=60, help="Posts on the fixture feed.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the stub randomness.")
+    parser.add_argument("--warm-cache", action="store_true", help="Keep the response cache between runs.")
+    parser.add_argument("--unlimited", action="store_true", help="Disable the per-provider rate limits.")
+    parser.add_argument("--browser", action="store_true", help="Drive Chrome against the fixture feed instead of fetching it directly.")
+    parser.add_argument("--output", default="bench_output.txt", help="File the JSON report is written to.")
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_scale=args.latency_scale,
+        error_rate=args.error_rate,
+        response_kb=args.response_kb,
+        paper_kb=args.paper_kb,
+        papers=args.papers,
+        linkedin_posts=args.linkedin_posts,
+        seed=args.seed,
+    )
+    server = start_stub_server(config)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    configure_environment(base_url)
+
+    import post_news
+    import post_news_limits
+
+    if args.unlimited:
+        for limits in post_news_limits.PROVIDER_LIMITS.values():
+            limits.update(per_minute=None, tokens_per_minute=None)
+    if not args.browser:
+        use_fixture_feed(post_news, os.environ["LINKEDIN_FEED_URL"])
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for i in range(args.runs):
+            calls_before = dict(config.calls)
+            result = run_once(post_news, work_dir, args.warm_cache)
+            result["stub_calls"] = {k: v - calls_before.get(k, 0) for k, v in config.calls.items()}
+            results.append(result)
+            print(f"Run {i + 1}: {result['wall_seconds']}s, calls {result['stub_calls']}", file=sys.stderr)
+
+    report = {
+        "config": vars(args),
+        "runs": results,
+        "stub_errors": dict(config.errors),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+    }
+    server.shutdown()
+    # The pipeline itself prints to stdout, so the report goes to a file.
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=4)
+    print(f"Benchmark report written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+from typing import Any, Callable, Optional
+
+
+class RunCheckpoint:
+    """
+    Stage-level checkpoints for one pipeline run, stored as JSON files in the run's
+    directory. Each file is written atomically (temp file, fsync, rename), so a crash
+    leaves either the previous checkpoint or the new one, never a partial file.
+
+    A checkpoint without a directory keeps nothing and simply runs every stage.
+    """
+
+    def __init__(self, run_dir: Optional[str]):
+        self.run_dir = run_dir
+
+    def _path(self, stage: str) -> str:
+        return os.path.join(self.run_dir, f"{stage}.json")
+
+    def exists(self) -> bool:
+        return self.run_dir is not None and os.path.isdir(self.run_dir)
+
+    def has(self, stage: str) -> bool:
+        return self.run_dir is not None and os.path.isfile(self._path(stage))
+
+    def load(self, stage: str) -> Any:
+        with open(self._path(stage), "r") as f:
+            return json.load(f)
+
+    def save(self, stage: str, data: Any) -> None:
+        if self.run_dir is None:
+            return
+        os.makedirs(self.run_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.run_dir, prefix=f".{stage}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(stage))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def run_stage(self, stage: str, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the checkpointed result of stage if there is one; otherwise computes
+        it, checkpoints it and returns it.
+        """
+        if self.has(stage):
+            print(f"Resuming: loaded stage '{stage}' from {self.run_dir}.")
+            return self.load(stage)
+        data = compute()
+        self.save(stage, data)
+        return data
@@ -0,0 +1,356 @@
+import hashlib
+import re
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Shingling and MinHash parameters. NUM_BANDS * ROWS_PER_BAND must equal NUM_HASHES.
+SHINGLE_SIZE = 3
+NUM_HASHES = 64
+NUM_BANDS = 16
+ROWS_PER_BAND = 4
+# Estimated Jaccard similarity above which two units are considered the same story.
+SIMILARITY_THRESHOLD = 0.5
+# Lower threshold for units citing the same canonical URL. A single roundup article
+# is often cited for several different stories, so a shared URL alone isn't enough.
+SHARED_CITATION_THRESHOLD = 0.15
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_PARAMS = [
+    (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+    for i in range(NUM_HASHES)
+]
+
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src", "ref_url", "src", "source", "trk", "mc_cid", "mc_eid"}
+
+HEADER_PATTERN = re.compile(r'^(Arxiv Research Paper|News Article) Posted .*$')
+LINKEDIN_POST_PATTERN = re.compile(r'```LinkedIn Post\s*\n(.*?)\n\s*```', re.DOTALL)
+LINKEDIN_HEADER = "LinkedIn Post"
+HEADING_PATTERN = re.compile(r'^(#{1,6}\s+\S.*|\*\*[^*]+\*\*:?)$')
+CITATION_MARKER_PATTERN = re.compile(r' ?\[(\d+)\]')
+URL_PATTERN = re.compile(r'https?://[^\s)\]>"\']+')
+
+
+class StoryUnit:
+    """
+    A single story taken from a source document, with the URLs it cites.
+
+    The canonical form of each URL is used for clustering and as its seen-index key,
+    while render() prints the URL as the source wrote it (the first one seen for
+    each canonical URL), so links keep the query parameters they need.
+    """
+
+    def __init__(self, text: str, header: str = "", urls: Optional[List[str]] = None):
+        self.text = text
+        self.header = header
+        self.urls: Dict[str, str] = {}
+        for url in urls or []:
+            url = url.strip().rstrip('.,;')
+            self.urls.setdefault(canonicalize_url(url), url)
+        self._signature = None
+
+    @property
+    def citations(self) -> List[str]:
+        """
+        The canonical citation URLs, in first-seen order.
+        """
+        return list(self.urls)
+
+    @property
+    def signature(self) -> List[int]:
+        if self._signature is None:
+            self._signature = minhash_signature(self.text)
+        return self._signature
+
+    def render(self) -> str:
+        parts = []
+        if self.header:
+            parts.append(self.header)
+        parts.append(self.text)
+        if self.urls:
+            parts.append("Citations:\n" + "\n".join(f"- {url}" for url in self.urls.values()))
+        return "\n\n".join(parts)
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes a URL so the same article linked from different sources compares equal:
+    lowercased scheme and host, no www., no fragment, no tracking parameters and no
+    trailing slash.
+    """
+    url = url.strip().rstrip('.,;')
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[len("www."):]
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(sorted(query)), ""))
+
+
+def _split_citation_list(body: str):
+    """
+    Separates a trailing 'Citations:' list from the body and returns (body, urls).
+    """
+    match = re.search(r'\n\s*Citations:\s*\n', body)
+    if not match:
+        return body, []
+    urls = []
+    for line in body[match.end():].splitlines():
+        line_match = re.match(r'\s*\d+\.\s*(\S+)', line)
+        if line_match:
+            urls.append(line_match.group(1))
+    return body[:match.start()], urls
+
+
+def citation_urls(document: str) -> Set[str]:
+    """
+    Returns the canonical URLs a document cites, from its 'Citations:' list and
+    inline links.
+    """
+    body, urls = _split_citation_list(document)
+    urls = urls + URL_PATTERN.findall(body)
+    return {canonicalize_url(url) for url in urls}
+
+
+class CitationCoverage:
+    """
+    Tracks the unique citation URLs found by repeated samples of the same query and
+    how many new ones each sample added.
+
+    The samples are saturated once `patience` of them in a row each added fewer than
+    `min_new` unseen URLs; further samples mostly repeat what is already covered.
+    """
+
+    def __init__(self, min_new: int = 2, patience: int = 2):
+        self.min_new = min_new
+        self.patience = patience
+        self.seen: Set[str] = set()
+        self.gains: List[int] = []
+        self._lock = threading.Lock()
+
+    def add(self, document: str) -> int:
+        """
+        Records one sample and returns the number of URLs it added.
+        """
+        urls = citation_urls(document)
+        with self._lock:
+            new = urls - self.seen
+            self.seen |= new
+            self.gains.append(len(new))
+            return len(new)
+
+    def saturated(self) -> bool:
+        with self._lock:
+            recent = self.gains[-self.patience:]
+            return len(recent) == self.patience and all(gain < self.min_new for gain in recent)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the number of samples, unique URLs, and the cumulative unique URL count
+        after each sample.
+        """
+        with self._lock:
+            cumulative = []
+            total = 0
+            for gain in self.gains:
+                total += gain
+                cumulative.append(total)
+            return {
+                "samples": len(self.gains),
+                "unique_urls": len(self.seen),
+                "new_urls_per_sample": list(self.gains),
+                "cumulative_unique_urls": cumulative,
+            }
+
+
+def split_story_units(document: str) -> List[StoryUnit]:
+    """
+    Splits a source document into story units.
+
+    arXiv summaries stay whole and every fenced LinkedIn post is one unit. Other
+    documents are split at headings, or at blank lines when there are no headings.
+    Numbered [n] markers are resolved against the document's citation list so each
+    unit carries its own URLs.
+    """
+    document = document.strip()
+    if not document:
+        return []
+
+    posts = [post.strip() for post in LINKEDIN_POST_PATTERN.findall(document) if post.strip()]
+    if posts:
+        return [
+            StoryUnit(post, LINKEDIN_HEADER, URL_PATTERN.findall(post))
+            for post in posts
+        ]
+
+    header = ""
+    lines = document.split("\n", 1)
+    if HEADER_PATTERN.match(lines[0].strip()):
+        header = lines[0].strip()
+        document = lines[1].strip() if len(lines) > 1 else ""
+
+    body, numbered_urls = _split_citation_list(document)
+
+    if header.startswith("Arxiv"):
+        chunks = [body]
+    else:
+        paragraphs = [p.strip() for p in re.split(r'\n\s*\n', body) if p.strip()]
+        has_headings = any(HEADING_PATTERN.match(p.splitlines()[0].strip()) for p in paragraphs)
+        if has_headings:
+            chunks = []
+            for paragraph in paragraphs:
+                if HEADING_PATTERN.match(paragraph.splitlines()[0].strip()) or not chunks:
+                    chunks.append(paragraph)
+                else:
+                    chunks[-1] += "\n\n" + paragraph
+        else:
+            chunks = paragraphs
+
+    units = []
+    for chunk in chunks:
+        urls = []
+        for marker in CITATION_MARKER_PATTERN.findall(chunk):
+            index = int(marker) - 1
+            if 0 <= index < len(numbered_urls):
+                urls.append(numbered_urls[index])
+        urls.extend(URL_PATTERN.findall(chunk))
+        text = CITATION_MARKER_PATTERN.sub("", chunk).strip() if numbered_urls else chunk.strip()
+        units.append(StoryUnit(text, header, urls))
+    return units
+
+
+def _shingles(text: str) -> Set[str]:
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash_signature(text: str) -> List[int]:
+    """
+    Computes the MinHash signature of the text's word shingles.
+    """
+    hashed = [zlib.crc32(shingle.encode()) for shingle in _shingles(text)]
+    if not hashed:
+        return [_MERSENNE_PRIME] * NUM_HASHES
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashed) for a, b in _HASH_PARAMS]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / NUM_HASHES
+
+
+def cluster_units(units: List[StoryUnit], threshold: float = SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """
+    Groups near-duplicate units. Two units land in the same cluster when their
+    estimated Jaccard similarity reaches threshold, or SHARED_CITATION_THRESHOLD
+    when they cite the same canonical URL.
+    """
+    parent = list(range(len(units)))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    signatures = [unit.signature for unit in units]
+
+    # Locality-sensitive hashing: only units sharing a band are compared.
+    candidates = set()
+    for band in range(NUM_BANDS):
+        buckets: Dict[tuple, List[int]] = {}
+        start = band * ROWS_PER_BAND
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(tuple(signature[start:start + ROWS_PER_BAND]), []).append(i)
+        for members in buckets.values():
+            for j in members[1:]:
+                candidates.add((members[0], j))
+    for i, j in candidates:
+        if estimate_similarity(signatures[i], signatures[j]) >= threshold:
+            union(i, j)
+
+    citing: Dict[str, List[int]] = {}
+    for i, unit in enumerate(units):
+        for url in unit.citations:
+            citing.setdefault(url, []).append(i)
+    for members in citing.values():
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                if estimate_similarity(signatures[i], signatures[j]) >= SHARED_CITATION_THRESHOLD:
+                    union(i, j)
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(units)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def merge_cluster(units: List[StoryUnit]) -> StoryUnit:
+    """
+    Collapses a cluster into its longest unit, keeping the citations of all members.
+    """
+    representative = max(units, key=lambda unit: len(unit.text))
+    urls = [url for unit in units for url in unit.urls.values()]
+    return StoryUnit(representative.text, representative.header, urls)
+
+
+class StoryIndex:
+    """
+    Thread-safe memo of each document's story units and their MinHash signatures.
+
+    Documents can be added from worker threads as soon as they arrive (for example
+    while other streams are still running), and dedupe_documents reuses that work.
+    """
+
+    def __init__(self):
+        self._units: Dict[str, List[StoryUnit]] = {}
+        self._lock = threading.Lock()
+
+    def add_document(self, document: str) -> List[StoryUnit]:
+        key = hashlib.sha256(document.encode()).hexdigest()
+        with self._lock:
+            units = self._units.get(key)
+        if units is None:
+            units = split_story_units(document)
+            for unit in units:
+                unit.signature  # computed now rather than in the final dedupe pass
+            with self._lock:
+                self._units[key] = units
+        return units
+
+
+def dedupe_documents(
+    documents: List[str],
+    threshold: float = SIMILARITY_THRESHOLD,
+    index: Optional[StoryIndex] = None,
+    unit_filter: Optional[Callable[[StoryUnit], bool]] = None,
+) -> List[str]:
+    """
+    Splits the documents into story units, collapses near-duplicate stories across
+    all documents and returns the merged units rendered as text, in first-seen order.
+    Documents already in index are not split or hashed again. Merged units for which
+    unit_filter returns False are left out.
+    """
+    index = index or StoryIndex()
+    units = [unit for document in documents for unit in index.add_document(document)]
+    clusters = cluster_units(units, threshold)
+    clusters.sort(key=min)
+    merged = [merge_cluster([units[i] for i in cluster]) for cluster in clusters]
+    if unit_filter is not None:
+        merged = [unit for unit in merged if unit_filter(unit)]
+    merged = [unit.render() for unit in merged]
+    print(f"Deduplicated {len(units)} story units from {len(documents)} documents into {len(merged)}.")
+    return merged
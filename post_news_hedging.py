@@ -0,0 +1,189 @@
+import concurrent.futures
+import logging
+import threading
+import time
+from typing import Callable, ContextManager, Dict, List, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+# Seconds between checks for room to send hedges when can_hedge said no, and for
+# calls that started running since the last check.
+HEDGE_RECHECK_SECONDS = 1.0
+
+
+def gather_quorum(
+    task: Callable[[threading.Event], T],
+    n: int,
+    quorum: Optional[int] = None,
+    deadline: Optional[float] = None,
+    hedge_after: Optional[float] = None,
+    label: str = "fan-out",
+    submit: Optional[Callable[..., concurrent.futures.Future]] = None,
+    can_hedge: Optional[Callable[[], bool]] = None,
+    max_in_flight: Optional[int] = None,
+    stop_when: Optional[Callable[[T], bool]] = None,
+    watch_start: Optional[Callable[[Callable[[], None]], ContextManager]] = None,
+    observe: Optional[Callable[[float], None]] = None,
+) -> List[T]:
+    """
+    Runs n independent copies of task concurrently and returns their results in
+    completion order as soon as quorum of them succeeded (all n by default) or
+    deadline seconds have passed, whichever comes first.
+
+    With max_in_flight, only that many copies run at a time and the next one starts
+    when one finishes. stop_when is called with every result in completion order;
+    once it returns True no further copies are started and the rest are abandoned.
+
+    With hedge_after, every copy still running that many seconds after it started
+    gets one duplicate; whichever of the two finishes first is used. can_hedge can
+    hold the duplicates back, e.g. while the provider is saturated and a duplicate
+    would only queue behind others. Each call of task gets its own threading.Event,
+    set once its result is no longer needed, so streaming calls can stop reading
+    early. Queued calls are cancelled; calls that can't be interrupted finish in the
+    background and their results are dropped.
+
+    A call starts when a thread picks it up, or with watch_start, when the callback
+    it is given fires, e.g. once the scheduler admits the call. watch_start wraps
+    each call as a context manager, so time spent queued never counts toward
+    hedge_after. observe is called with the running time of every call that
+    succeeds, measured from that start.
+
+    A copy that raises counts as failed once its duplicate, if any, failed too.
+    The calls run on submit, e.g. a shared executor's submit method, or on a pool of
+    their own.
+    """
+    quorum = n if quorum is None else min(quorum, n)
+    max_in_flight = n if max_in_flight is None else max(1, min(max_in_flight, n))
+    start = time.monotonic()
+    results: List[T] = []
+    slots: Dict[concurrent.futures.Future, int] = {}
+    stops: Dict[concurrent.futures.Future, threading.Event] = {}
+    pending: Set[concurrent.futures.Future] = set()
+    # When the first call of each slot started running, set from the calls' threads
+    started_at: Dict[int, float] = {}
+    started_lock = threading.Lock()
+    launched = 0
+    hedged: Set[int] = set()
+    finished: Set[int] = set()
+    hold_hedges_until = 0.0
+    failures = 0
+    stopped = False
+
+    executor = None
+    if submit is None:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=2 * max_in_flight if hedge_after is not None else max_in_flight)
+        submit = executor.submit
+
+    def run(slot: int, stop: threading.Event) -> T:
+        call_started = []
+
+        def mark_started() -> None:
+            now = time.monotonic()
+            if not call_started:
+                call_started.append(now)
+            with started_lock:
+                started_at.setdefault(slot, now)
+
+        if watch_start is None:
+            mark_started()
+            result = task(stop)
+        else:
+            with watch_start(mark_started):
+                result = task(stop)
+        if observe is not None and call_started:
+            observe(time.monotonic() - call_started[0])
+        return result
+
+    def start_call(slot: int) -> None:
+        stop = threading.Event()
+        future = submit(run, slot, stop)
+        slots[future] = slot
+        stops[future] = stop
+        pending.add(future)
+
+    def fill() -> None:
+        nonlocal launched
+        while not stopped and launched < n and launched - len(finished) < max_in_flight:
+            start_call(launched)
+            launched += 1
+
+    def hedge_candidates() -> Dict[int, Optional[float]]:
+        # Unhedged slots still running, with their start time or None while queued
+        with started_lock:
+            return {slot: started_at.get(slot) for slot in {slots[future] for future in pending} - hedged}
+
+    try:
+        fill()
+        while len(results) < quorum and pending:
+            now = time.monotonic()
+            if deadline is not None and now - start >= deadline:
+                logging.warning(f"{label}: deadline of {deadline:g}s passed with {len(results)} of {n} results.")
+                break
+            timeouts = []
+            if deadline is not None:
+                timeouts.append(start + deadline - now)
+            if hedge_after is not None:
+                candidates = hedge_candidates()
+                due = [started + hedge_after for started in candidates.values() if started is not None]
+                if due:
+                    timeouts.append(max(min(due), hold_hedges_until) - now)
+                if None in candidates.values():
+                    timeouts.append(HEDGE_RECHECK_SECONDS)
+            done, _ = concurrent.futures.wait(
+                pending, timeout=max(min(timeouts), 0) if timeouts else None, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                pending.discard(future)
+                slot = slots[future]
+                if slot in finished:
+                    continue
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if any(slots[other] == slot for other in pending):
+                        # Its duplicate is still running
+                        continue
+                    logging.error(f"{label}: call {slot + 1} failed: {e}")
+                    finished.add(slot)
+                    failures += 1
+                    continue
+                finished.add(slot)
+                results.append(result)
+                # The duplicate of this call lost the race
+                for other in list(pending):
+                    if slots[other] == slot:
+                        stops[other].set()
+                        other.cancel()
+                        pending.discard(other)
+                if not stopped and stop_when is not None and stop_when(result):
+                    print(f"{label}: stopping after {len(results)} results.")
+                    stopped = True
+            if stopped:
+                break
+            fill()
+
+            now = time.monotonic()
+            if hedge_after is not None and now >= hold_hedges_until:
+                due = sorted(
+                    slot for slot, started in hedge_candidates().items()
+                    if started is not None and now - started >= hedge_after
+                )
+                if due and can_hedge is not None and not can_hedge():
+                    hold_hedges_until = now + HEDGE_RECHECK_SECONDS
+                    continue
+                for slot in due:
+                    start_call(slot)
+                    hedged.add(slot)
+    finally:
+        for future in pending:
+            stops[future].set()
+            future.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    print(
+        f"{label}: {len(results)} of {n} results in {time.monotonic() - start:.1f}s "
+        f"({launched} started, {len(hedged)} hedged, {failures} failed, "
+        f"{launched - len(finished)} abandoned)."
+    )
+    return results
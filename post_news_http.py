@@ -0,0 +1,137 @@
+import email.utils
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from post_news_metrics import metrics
+
+# Connection pool size per host. Requests beyond this wait for a free connection.
+POOL_MAXSIZE = 10
+
+# Retry policy: jittered exponential backoff, capped, for transient failures.
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """
+    Raised when a call to an external provider fails for good.
+    """
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+class RateLimitError(ProviderError):
+    """
+    Raised when a provider keeps answering 429 after all retries, or asks to wait
+    longer than BACKOFF_MAX before the next one.
+    """
+
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(provider: str) -> requests.Session:
+    """
+    Returns the shared pooled session for a provider, creating it on first use.
+    Connections are reused across calls and threads instead of a new TLS handshake
+    per request.
+    """
+    with _sessions_lock:
+        session = _sessions.get(provider)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[provider] = session
+        return session
+
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """
+    Full-jitter exponential backoff for the given zero-based attempt.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def request_with_retry(
+    provider: str,
+    method: str,
+    url: str,
+    max_retries: int = MAX_RETRIES,
+    model: str = "",
+    **kwargs,
+) -> requests.Response:
+    """
+    Sends a request through the provider's pooled session, retrying connection
+    errors, timeouts, 429 and 5xx responses with jittered exponential backoff. A
+    Retry-After header takes precedence over the computed delay, unless it asks for
+    more than BACKOFF_MAX: the caller usually holds a scheduler slot, so the request
+    fails right away instead of sleeping on it. Every attempt is recorded in the
+    call latency metrics under (provider, model).
+
+    Raises:
+        RateLimitError: If the provider is still rate limiting after the last retry,
+            or asks to wait longer than BACKOFF_MAX.
+        ProviderError: On any other failure, including non-retryable status codes.
+    """
+    session = get_session(provider)
+    for attempt in range(max_retries + 1):
+        retry_after = None
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            metrics.observe_call(provider, model, time.monotonic() - start, error=True)
+            error = ProviderError(provider, f"{type(e).__name__}: {e}")
+        except requests.RequestException as e:
+            metrics.observe_call(provider, model, time.monotonic() - start, error=True)
+            raise ProviderError(provider, str(e)) from e
+        else:
+            metrics.observe_call(provider, model, time.monotonic() - start, error=not response.ok)
+            if response.ok:
+                return response
+            message = f"HTTP {response.status_code}: {response.text[:200]}"
+            if response.status_code == 429:
+                error = RateLimitError(provider, message, response.status_code)
+            else:
+                error = ProviderError(provider, message, response.status_code)
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                raise error
+            retry_after = _retry_after_seconds(response)
+
+        if attempt == max_retries:
+            raise error
+        if retry_after is not None and retry_after > BACKOFF_MAX:
+            logging.warning(f"{error}. Retry-After of {retry_after:.0f}s exceeds {BACKOFF_MAX:g}s, giving up.")
+            raise error
+        delay = retry_after if retry_after is not None else backoff_delay(attempt)
+        logging.warning(f"{error}. Retrying in {delay:.1f}s (attempt {attempt + 1} of {max_retries}).")
+        time.sleep(delay)
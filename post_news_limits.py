@@ -0,0 +1,211 @@
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from post_news_metrics import metrics
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate` per second up to `capacity`. acquire()
+    blocks until enough tokens are available, so callers are spaced out evenly
+    instead of sleeping a fixed random time after every request.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        Takes `tokens` from the bucket, waiting for them if needed.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        tokens = min(tokens, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait_time = (tokens - self._tokens) / self.rate
+            time.sleep(wait_time)
+            waited += wait_time
+
+    def available(self) -> float:
+        """
+        Returns the number of tokens that could be taken right now.
+        """
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+# Priority lanes: lower values are admitted first when a provider is saturated.
+PRIORITY_JUDGE = 0
+PRIORITY_GENERATION = 1
+PRIORITY_SUMMARY = 2
+
+# Limits per provider lane: concurrent calls, requests per minute with their burst
+# size, and prompt tokens per minute (None for no limit). OpenAI gets one lane per
+# model with these limits unless an "openai/<model>" entry overrides them.
+PROVIDER_LIMITS = {
+    "openai": {"concurrency": 8, "per_minute": 30, "burst": 5, "tokens_per_minute": 200_000},
+    "perplexity": {"concurrency": 10, "per_minute": 50, "burst": 10, "tokens_per_minute": None},
+    "firecrawl": {"concurrency": 5, "per_minute": 20, "burst": 5, "tokens_per_minute": None},
+}
+
+# Threads running work submitted to the scheduler. Calls block in their provider's
+# lane, so this only bounds how much work can be waiting at once.
+SCHEDULER_WORKERS = 64
+
+
+class _Lane:
+    def __init__(self, limits: Dict[str, Optional[float]]):
+        self.concurrency = limits.get("concurrency") or float("inf")
+        self.requests = TokenBucket(limits["per_minute"] / 60.0, limits["burst"]) if limits.get("per_minute") else None
+        tokens_per_minute = limits.get("tokens_per_minute")
+        self.tokens = TokenBucket(tokens_per_minute / 60.0, tokens_per_minute) if tokens_per_minute else None
+        self.cond = threading.Condition()
+        self.waiters: List[Tuple[int, int]] = []
+        self.active = 0
+        self.admitting = False
+
+
+class Scheduler:
+    """
+    Shared scheduler for all provider calls.
+
+    Every call to a rate-limited provider runs inside slot(), which admits calls per
+    lane (provider, or provider and model for OpenAI) in priority order, keeps at
+    most the lane's concurrency in flight and paces admissions on its request and
+    prompt token budgets. Fan-outs submit their calls with submit() or map() instead
+    of creating their own thread pools.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, Optional[float]]]] = None, max_workers: int = SCHEDULER_WORKERS):
+        self.limits = PROVIDER_LIMITS if limits is None else limits
+        self._lanes: Dict[Tuple[str, str], Optional[_Lane]] = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="scheduler")
+        self._seq = itertools.count()
+        self._local = threading.local()
+
+    def _lane(self, provider: str, model: str) -> Optional[_Lane]:
+        key = (provider, model if provider == "openai" else "")
+        with self._lock:
+            if key not in self._lanes:
+                limits = self.limits.get(f"{provider}/{model}", self.limits.get(provider))
+                self._lanes[key] = _Lane(limits) if limits else None
+            return self._lanes[key]
+
+    @contextmanager
+    def on_admit(self, callback: Callable[[], None]):
+        """
+        Context manager calling callback whenever a slot is admitted on this thread
+        while it is active, e.g. so a fan-out can time its calls from admission
+        instead of from when they were queued.
+        """
+        previous = getattr(self._local, "on_admit", None)
+        self._local.on_admit = callback
+        try:
+            yield
+        finally:
+            self._local.on_admit = previous
+
+    def _admitted(self) -> None:
+        callback = getattr(self._local, "on_admit", None)
+        if callback is not None:
+            callback()
+
+    @contextmanager
+    def slot(self, provider: str, model: str = "", priority: int = PRIORITY_GENERATION, tokens: int = 0):
+        """
+        Context manager holding one of the provider's slots for the duration of a
+        call. Providers without limits are not queued.
+        """
+        lane = self._lane(provider, model)
+        if lane is None:
+            self._admitted()
+            yield
+            return
+        start = time.monotonic()
+        entry = (priority, next(self._seq))
+        with lane.cond:
+            heapq.heappush(lane.waiters, entry)
+            metrics.observe_queue(provider, model, len(lane.waiters))
+            while lane.waiters[0] != entry or lane.admitting or lane.active >= lane.concurrency:
+                lane.cond.wait()
+            # Stay at the head of the queue while pacing, so admissions keep priority order
+            lane.admitting = True
+            lane.active += 1
+        try:
+            if lane.requests is not None:
+                lane.requests.acquire()
+            if lane.tokens is not None and tokens:
+                lane.tokens.acquire(tokens)
+        except BaseException:
+            with lane.cond:
+                lane.active -= 1
+                raise
+        finally:
+            with lane.cond:
+                lane.admitting = False
+                lane.waiters.remove(entry)
+                heapq.heapify(lane.waiters)
+                metrics.observe_queue(provider, model, len(lane.waiters), waited=time.monotonic() - start)
+                lane.cond.notify_all()
+        try:
+            self._admitted()
+            yield
+        finally:
+            with lane.cond:
+                lane.active -= 1
+                lane.cond.notify_all()
+
+    def has_capacity(self, provider: str, model: str = "") -> bool:
+        """
+        Returns whether a call to the provider would be admitted right away: nothing
+        is queued, a slot is free and the request budget has room.
+        """
+        lane = self._lane(provider, model)
+        if lane is None:
+            return True
+        with lane.cond:
+            if lane.waiters or lane.admitting or lane.active >= lane.concurrency:
+                return False
+        return lane.requests is None or lane.requests.available() >= 1
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> concurrent.futures.Future:
+        """
+        Runs fn(*args, **kwargs) on the scheduler's threads.
+        """
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn: Callable[..., Any], *iterables) -> Iterator[Any]:
+        """
+        Like map(), with the calls running concurrently on the scheduler's threads.
+        Results are returned in input order.
+        """
+        return self._executor.map(fn, *iterables)
+
+
+# Scheduler shared by all call sites.
+scheduler = Scheduler()
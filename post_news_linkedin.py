@@ -1,3 +1,4 @@
+import hashlib
 import os
 import sys
 import time
@@ -5,7 +6,9 @@ import random
 import signal
 import subprocess
 import shutil
-from typing import List
+import threading
+import urllib.request
+from typing import Iterator, List, Optional
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options
@@ -25,12 +28,21 @@ except ImportError:
 class LinkedInScraper:
     # File and Path Constants
     PID_FILE = os.path.expanduser("./post_news_chrome_pid.txt")
-    CHROME_PATH = "/Applications/Google Chrome Dev.app/Contents/MacOS/Google Chrome Dev"
+    CHROME_PATH = os.getenv("CHROME_PATH", "")
+    # Tried in order when CHROME_PATH is not set
+    CHROME_CANDIDATES = [
+        "google-chrome",
+        "google-chrome-stable",
+        "chromium",
+        "chromium-browser",
+        "/Applications/Google Chrome Dev.app/Contents/MacOS/Google Chrome Dev",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+    ]
     USER_DATA_DIR = os.path.expanduser("./post_news_chrome_state")
 
     # Network and URL Constants
     REMOTE_DEBUGGING_PORT = "9222"
-    LINKEDIN_FEED_URL = "https://www.linkedin.com/feed/"
+    LINKEDIN_FEED_URL = os.getenv("LINKEDIN_FEED_URL", "https://www.linkedin.com/feed/")
 
     # Scrolling Constants
     DEFAULT_SCROLL_PAUSE_TIME_MIN = 2  # Minimum pause time between scrolls in seconds
@@ -39,13 +51,88 @@ class LinkedInScraper:
     DEFAULT_SCROLL_INCREMENT_MAX = 1000  # Maximum pixels to scroll per increment
     DEFAULT_MAX_SCROLLS = 30  # Maximum number of scrolls
 
+    # Adaptive Scrolling Constants
+    DEFAULT_ADAPTIVE = False  # Stop on low new-post yield and wait on DOM mutations instead of fixed sleeps
+    DEFAULT_MIN_NEW_POSTS_PER_SCROLL = 1  # A scroll yielding fewer new posts counts as low yield
+    DEFAULT_LOW_YIELD_PATIENCE = 3  # Stop after this many consecutive low-yield scrolls
+    DEFAULT_MAX_POSTS = None  # Stop once this many unique posts were collected
+    DEFAULT_TIME_BUDGET = None  # Stop scrolling after this many seconds
+    MUTATION_SETTLE_MS = 250  # Grace period after the first new post appears, for its siblings to render
+
     # Process Management Constants
     CHROME_TERMINATION_TIMEOUT = 10  # Timeout in seconds for terminating Chrome
     TERMINATION_SLEEP_DURATION = 5  # Sleep duration in seconds before killing Chrome
+    CHROME_STARTUP_TIMEOUT = 30  # Seconds to wait for a launched Chrome to open its debugging port
+    DEBUG_PORT_PROBE_TIMEOUT = 2  # Timeout in seconds for one debugging port liveness probe
+
+    # Lean Profile Constants
+    DEFAULT_HEADLESS = False
+    DEFAULT_BLOCK_RESOURCES = False
+    HEADLESS_ARGS = [
+        "--headless=new",
+        "--disable-gpu",
+        "--window-size=1280,2000",
+        "--mute-audio",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-extensions",
+        "--blink-settings=imagesEnabled=false",
+    ]
+    # URL patterns blocked through CDP: images, media, fonts and third-party trackers.
+    # Only the commentary text is scraped, so none of these are needed.
+    BLOCKED_URL_PATTERNS = [
+        "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+        "*.mp4", "*.webm", "*.m3u8", "*.ts", "*.mp3",
+        "*.woff", "*.woff2", "*.ttf", "*.otf",
+        "*media.licdn.com/dms/image*", "*dms.licdn.com/playlist*",
+        "*doubleclick.net*", "*google-analytics.com*", "*googletagmanager.com*",
+        "*px.ads.linkedin.com*", "*bat.bing.com*", "*connect.facebook.net*",
+        "*scorecardresearch.com*", "*adservice.google.com*",
+    ]
 
     # WebDriver Constants
     WEBDRIVER_SLEEP_AFTER_NAVIGATION = 5  # Sleep time after navigating to the feed
 
+    # Extraction Constants
+    POST_CLASS = "update-components-text relative update-components-update-v2__commentary"
+    SEEN_ATTRIBUTE = "data-post-news-seen"
+    # Returns the text of commentary nodes not returned before and marks them as seen,
+    # so each scroll step only transfers the posts it loaded.
+    EXTRACT_NEW_POSTS_SCRIPT = """
+        const nodes = document.querySelectorAll(
+            'div.update-components-text.update-components-update-v2__commentary:not([data-post-news-seen])'
+        );
+        const texts = [];
+        for (const node of nodes) {
+            node.setAttribute('data-post-news-seen', '1');
+            texts.push(node.innerText);
+        }
+        return texts;
+    """
+    # Async script: resolves true once an unseen commentary node is in the DOM, or
+    # false after the timeout. Replaces the fixed random sleep in adaptive mode.
+    WAIT_FOR_NEW_POSTS_SCRIPT = """
+        const [timeoutMs, settleMs] = arguments;
+        const done = arguments[arguments.length - 1];
+        const selector = 'div.update-components-text.update-components-update-v2__commentary:not([data-post-news-seen])';
+        if (document.querySelector(selector)) {
+            done(true);
+            return;
+        }
+        const observer = new MutationObserver(() => {
+            if (document.querySelector(selector)) {
+                observer.disconnect();
+                clearTimeout(timer);
+                setTimeout(() => done(true), settleMs);
+            }
+        });
+        observer.observe(document.body, {childList: true, subtree: true});
+        const timer = setTimeout(() => {
+            observer.disconnect();
+            done(false);
+        }, timeoutMs);
+    """
+
     # Messaging Constants
     ERROR_WEB_DRIVER_NOT_INITIALIZED = "WebDriver is not initialized."
     ERROR_GOOGLE_CHROME_NOT_FOUND = "Google Chrome executable not found. Please check the CHROME_PATH."
@@ -66,6 +153,15 @@ class LinkedInScraper:
         scroll_increment_max=DEFAULT_SCROLL_INCREMENT_MAX,
         max_scrolls=DEFAULT_MAX_SCROLLS,
         verbose=True,
+        adaptive=DEFAULT_ADAPTIVE,
+        min_new_posts_per_scroll=DEFAULT_MIN_NEW_POSTS_PER_SCROLL,
+        low_yield_patience=DEFAULT_LOW_YIELD_PATIENCE,
+        max_posts=DEFAULT_MAX_POSTS,
+        time_budget=DEFAULT_TIME_BUDGET,
+        keep_alive=False,
+        chrome_path=None,
+        headless=DEFAULT_HEADLESS,
+        block_resources=DEFAULT_BLOCK_RESOURCES,
     ):
         self.scroll_pause_time_min = scroll_pause_time_min
         self.scroll_pause_time_max = scroll_pause_time_max
@@ -73,17 +169,41 @@ class LinkedInScraper:
         self.scroll_increment_max = scroll_increment_max
         self.max_scrolls = max_scrolls
         self.verbose = verbose
+        self.adaptive = adaptive
+        self.min_new_posts_per_scroll = min_new_posts_per_scroll
+        self.low_yield_patience = low_yield_patience
+        self.max_posts = max_posts
+        self.time_budget = time_budget
+        # Keep Chrome running after a scrape and attach to it on the next run
+        self.keep_alive = keep_alive
+        self.chrome_path = chrome_path or self._find_chrome()
+        self.headless = headless
+        self.block_resources = block_resources
         self.driver = None
+        self._seen_hashes = set()
+        self._stop = None
 
         # Validate environment
         self._validate_environment()
 
+    def _find_chrome(self) -> str:
+        """
+        Resolve the Chrome binary: CHROME_PATH if set, else the first candidate found.
+        """
+        if self.CHROME_PATH:
+            return self.CHROME_PATH
+        for candidate in self.CHROME_CANDIDATES:
+            path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+            if path:
+                return path
+        return ""
+
     def _validate_environment(self):
         """
         Validate that all necessary components and paths are set up correctly.
         """
         # Check if Chrome executable exists
-        if not self.CHROME_PATH or not os.path.isfile(self.CHROME_PATH):
+        if not self.chrome_path or not os.path.isfile(self.chrome_path):
             print(self.ERROR_GOOGLE_CHROME_NOT_FOUND)
             sys.exit(1)
 
@@ -129,14 +249,78 @@ class LinkedInScraper:
         spec = importlib.util.find_spec(package_name)
         return spec is not None
 
-    def _slow_infinite_scroll(self):
+    @staticmethod
+    def _format_post(content: str) -> str:
+        return f"```LinkedIn Post\n\n{content}\n\n```\n\n"
+
+    def _extract_new_posts(self) -> List[str]:
+        """
+        Returns the posts loaded since the last call, deduplicated by content hash.
+
+        Only the not yet seen commentary nodes are read, through a JS query, instead
+        of parsing the whole feed DOM. If the query fails, the page source is parsed
+        with BeautifulSoup as a fallback; the hash check still drops repeats.
+        """
+        try:
+            texts = self.driver.execute_script(self.EXTRACT_NEW_POSTS_SCRIPT) or []
+        except WebDriverException as e:
+            if self.verbose:
+                print(f"JS extraction failed, parsing page source instead: {e}")
+            soup = BeautifulSoup(self.driver.page_source, "html.parser")
+            texts = [post.get_text(strip=True) for post in soup.find_all("div", class_=self.POST_CLASS)]
+
+        posts = []
+        for text in texts:
+            content = text.strip()
+            if not content:
+                continue
+            content_hash = hashlib.sha256(content.encode()).hexdigest()
+            if content_hash in self._seen_hashes:
+                continue
+            self._seen_hashes.add(content_hash)
+            posts.append(self._format_post(content))
+        return posts
+
+    def _wait_for_new_posts(self) -> bool:
+        """
+        Waits until the feed renders an unseen post, at most scroll_pause_time_max seconds.
+
+        Returns:
+            bool: True if new posts appeared, False on timeout.
+        """
+        timeout = self.scroll_pause_time_max
+        try:
+            self.driver.set_script_timeout(timeout + 5)
+            return bool(self.driver.execute_async_script(
+                self.WAIT_FOR_NEW_POSTS_SCRIPT, int(timeout * 1000), self.MUTATION_SETTLE_MS
+            ))
+        except WebDriverException as e:
+            if self.verbose:
+                print(f"Waiting on DOM mutations failed, sleeping instead: {e}")
+            time.sleep(timeout)
+            return False
+
+    def _slow_infinite_scroll(self) -> Iterator[str]:
+        """
+        Scrolls the feed and yields new posts after the initial load and after every
+        scroll step, so they can be consumed before scrolling ends.
+
+        Besides the page bottom and max_scrolls, adaptive mode stops after
+        low_yield_patience consecutive scrolls that each found fewer than
+        min_new_posts_per_scroll new posts. max_posts, time_budget and the stop event
+        passed to iter_posts also stop scrolling when set.
+        """
         try:
             if not self.driver:
                 raise WebDriverException(self.ERROR_WEB_DRIVER_NOT_INITIALIZED)
 
+            start = time.monotonic()
+            yield from self._extract_new_posts()
+
             # Get the initial scroll height
             last_height = self.driver.execute_script("return document.body.scrollHeight")
             scroll_count = 0
+            low_yield_streak = 0
 
             while True:
                 scroll_increment = random.uniform(
@@ -153,13 +337,47 @@ class LinkedInScraper:
                         f"Scroll number {scroll_count}: Scrolled down by {scroll_increment} pixels."
                     )
 
-                # Wait for a random time between min and max pause time
-                sleep_time = random.uniform(
-                    self.scroll_pause_time_min, self.scroll_pause_time_max
-                )
+                if self.adaptive:
+                    # Wait for the feed to render new posts instead of a fixed time
+                    self._wait_for_new_posts()
+                else:
+                    # Wait for a random time between min and max pause time
+                    sleep_time = random.uniform(
+                        self.scroll_pause_time_min, self.scroll_pause_time_max
+                    )
+                    if self.verbose:
+                        print(f"Sleeping for {sleep_time:.2f} seconds.")
+                    time.sleep(sleep_time)
+
+                new_posts = self._extract_new_posts()
                 if self.verbose:
-                    print(f"Sleeping for {sleep_time:.2f} seconds.")
-                time.sleep(sleep_time)
+                    print(f"Found {len(new_posts)} new posts ({len(self._seen_hashes)} total).")
+                yield from new_posts
+
+                if self.adaptive:
+                    if len(new_posts) < self.min_new_posts_per_scroll:
+                        low_yield_streak += 1
+                    else:
+                        low_yield_streak = 0
+                    if low_yield_streak >= self.low_yield_patience:
+                        if self.verbose:
+                            print(f"New post yield stayed low for {low_yield_streak} scrolls. Stopping.")
+                        break
+
+                if self.max_posts is not None and len(self._seen_hashes) >= self.max_posts:
+                    if self.verbose:
+                        print(f"Reached the maximum number of posts: {self.max_posts}")
+                    break
+
+                if self.time_budget is not None and time.monotonic() - start >= self.time_budget:
+                    if self.verbose:
+                        print(f"Reached the scrolling time budget: {self.time_budget}s")
+                    break
+
+                if self._stop is not None and self._stop.is_set():
+                    if self.verbose:
+                        print("Scrolling stopped by the caller.")
+                    break
 
                 # Calculate new scroll height and compare with last scroll height
                 new_height = self.driver.execute_script(
@@ -198,10 +416,12 @@ class LinkedInScraper:
 
         # Construct the command as a list
         cmd = [
-            self.CHROME_PATH,
+            self.chrome_path,
             f"--remote-debugging-port={self.REMOTE_DEBUGGING_PORT}",
             f"--user-data-dir={self.USER_DATA_DIR}",
         ]
+        if self.headless:
+            cmd.extend(self.HEADLESS_ARGS)
 
         try:
             # Launch Chrome
@@ -230,6 +450,92 @@ class LinkedInScraper:
             print(self.ERROR_LAUNCHING_CHROME.format(e))
             sys.exit(1)
 
+    def _read_pid(self):
+        try:
+            with open(self.PID_FILE, "r") as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _pid_alive(pid: int) -> bool:
+        if psutil:
+            return psutil.pid_exists(pid)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _debug_port_alive(self) -> bool:
+        url = f"http://127.0.0.1:{self.REMOTE_DEBUGGING_PORT}/json/version"
+        try:
+            with urllib.request.urlopen(url, timeout=self.DEBUG_PORT_PROBE_TIMEOUT) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    def _chrome_is_healthy(self) -> bool:
+        """
+        Check whether the Chrome recorded in the PID file is alive and serving the
+        remote debugging port, so it can be reused.
+        """
+        pid = self._read_pid()
+        if pid is None:
+            return False
+        if not self._pid_alive(pid):
+            if self.verbose:
+                print(f"Stale PID file {self.PID_FILE} for dead process {pid}. Removing it.")
+            try:
+                os.remove(self.PID_FILE)
+            except OSError:
+                pass
+            return False
+        return self._debug_port_alive()
+
+    def _wait_for_debug_port(self):
+        deadline = time.monotonic() + self.CHROME_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self._debug_port_alive():
+                return
+            time.sleep(0.5)
+        if self.verbose:
+            print(f"Chrome debugging port {self.REMOTE_DEBUGGING_PORT} not up after {self.CHROME_STARTUP_TIMEOUT}s.")
+
+    def _ensure_chrome(self):
+        """
+        In keep-alive mode, reuse a healthy running Chrome; otherwise launch one.
+        """
+        if self.keep_alive and self._chrome_is_healthy():
+            print(f"Attaching to running Chrome on port {self.REMOTE_DEBUGGING_PORT}.")
+            return
+        if self.keep_alive and os.path.exists(self.PID_FILE):
+            # Alive but not answering on the debugging port: replace it
+            self._kill_chrome()
+        self._launch_chrome()
+        self._wait_for_debug_port()
+
+    def detach(self):
+        """
+        Close the WebDriver session but leave Chrome running for the next run.
+        """
+        if self.driver:
+            try:
+                self.driver.quit()
+                print("WebDriver session closed. Chrome left running.")
+            except Exception as e:
+                print(self.ERROR_QUITTING_WEBDRIVER.format(e))
+            self.driver = None
+
+    def shutdown(self):
+        """
+        Stop a Chrome kept alive by earlier runs.
+        """
+        self.detach()
+        self._kill_chrome()
+
     def _kill_chrome(self):
         if not os.path.exists(self.PID_FILE):
             if self.verbose:
@@ -299,6 +605,9 @@ class LinkedInScraper:
             self.driver = webdriver.Chrome(options=options)
             print("WebDriver connected to the Chrome instance.")
 
+            if self.block_resources:
+                self._block_resources()
+
         except SessionNotCreatedException as e:
             print(self.ERROR_CONNECTING_WEBDRIVER.format("Session not created. " + str(e)))
             self._kill_chrome()
@@ -312,11 +621,23 @@ class LinkedInScraper:
             self._kill_chrome()
             sys.exit(1)
 
-    def _scrape_posts(self) -> List[str]:
-        posts = []
+    def _block_resources(self):
+        """
+        Block images, media, fonts and trackers for this session through CDP.
+        """
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.BLOCKED_URL_PATTERNS})
+            if self.verbose:
+                print(f"Blocking {len(self.BLOCKED_URL_PATTERNS)} resource URL patterns.")
+        except WebDriverException as e:
+            # Not fatal: the scrape still works, just heavier
+            print(f"Failed to enable resource blocking: {e}")
+
+    def _scrape_posts(self) -> Iterator[str]:
         if not self.driver:
             print(self.ERROR_WEB_DRIVER_NOT_INITIALIZED)
-            return posts  # Return empty list instead of None
+            return
 
         try:
             # Navigate to LinkedIn feed
@@ -328,54 +649,49 @@ class LinkedInScraper:
 
             #stuff = input("Pause to get Chrome logged in and have no issues getting to LinkedIn")
 
-            # Perform slow scrolling
-            self._slow_infinite_scroll()
-
-            # Extract page source and parse with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-
-            # Scrape posts from the feed (adjust selectors based on LinkedIn's HTML structure)
-            post_elements = soup.find_all(
-                "div",
-                class_="update-components-text relative update-components-update-v2__commentary",
-            )
+            # Scroll slowly, extracting the new posts after each step
+            yield from self._slow_infinite_scroll()
 
             if self.verbose:
-                print(f"Found {len(post_elements)} posts")
-
-            for post in post_elements:
-                content = post.get_text(strip=True)
-                formatted_content = f"```LinkedIn Post\n\n{content}\n\n```\n\n"
-                posts.append(formatted_content)
+                print(f"Found {len(self._seen_hashes)} posts")
 
         except Exception as e:
             print(self.ERROR_SCRAPING.format(e))
 
-        return posts
-
-    def run(self) -> List[str]:
-        posts = []
+    def iter_posts(self, stop: Optional[threading.Event] = None) -> Iterator[str]:
+        """
+        Runs the scrape and yields each post as soon as it is extracted. Chrome and
+        WebDriver are cleaned up when the generator finishes or is closed. Setting
+        stop ends scrolling after the current step, e.g. once the caller gave up.
+        """
+        self._seen_hashes = set()
+        self._stop = stop
 
         try:
-            self._launch_chrome()
+            self._ensure_chrome()
             self._start_driver()
-            posts = self._scrape_posts()
+            yield from self._scrape_posts()
 
         except KeyboardInterrupt:
             print("Process interrupted by user.")
 
         finally:
             # Ensure that resources are cleaned up properly
-            if self.driver:
-                try:
-                    self.driver.quit()
-                    print("WebDriver session closed.")
-                except Exception as e:
-                    print(self.ERROR_QUITTING_WEBDRIVER.format(e))
-            time.sleep(self.TERMINATION_SLEEP_DURATION)  # Optional: Wait before killing Chrome
-            self._kill_chrome()
+            if self.keep_alive:
+                # Leave Chrome warm for the next run
+                self.detach()
+            else:
+                if self.driver:
+                    try:
+                        self.driver.quit()
+                        print("WebDriver session closed.")
+                    except Exception as e:
+                        print(self.ERROR_QUITTING_WEBDRIVER.format(e))
+                time.sleep(self.TERMINATION_SLEEP_DURATION)  # Optional: Wait before killing Chrome
+                self._kill_chrome()
 
-        return posts
+    def run(self) -> List[str]:
+        return list(self.iter_posts())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Upper bounds in seconds of the call latency histogram buckets.
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 40, 60, 120, 180, 300)
+
+# USD per million prompt and completion tokens. List prices; update as they change.
+MODEL_PRICING = {
+    "o1-mini": {"prompt": 1.10, "completion": 4.40},
+    "gpt-4o": {"prompt": 2.50, "completion": 10.00},
+    "sonar-pro": {"prompt": 3.00, "completion": 15.00},
+}
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+
+
+class Metrics:
+    """
+    Thread-safe collector for per-run pipeline metrics: wall time per stage, a latency
+    histogram per (provider, model), running times of fan-out calls per call type and
+    token usage with cost per model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Clears everything recorded so far, e.g. between runs in one process.
+        """
+        self.started = time.time()
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"seconds": 0.0, "count": 0})
+        self.latencies: Dict[tuple, Dict[str, Any]] = {}
+        self.errors: Dict[tuple, int] = defaultdict(int)
+        self.usage: Dict[str, Dict[str, float]] = defaultdict(lambda: {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0})
+        self.queues: Dict[tuple, Dict[str, float]] = defaultdict(lambda: {"depth": 0, "max_depth": 0, "admitted": 0, "wait_seconds": 0.0})
+        self.fan_out_calls: Dict[str, List[float]] = defaultdict(list)
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Context manager recording the wall time of a pipeline stage.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                self.stages[name]["seconds"] += elapsed
+                self.stages[name]["count"] += 1
+
+    def timed_stage(self, name: Optional[str] = None):
+        """
+        Decorator recording each call of the function as a stage, named after the
+        function unless name is given.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe_call(self, provider: str, model: str, seconds: float, error: bool = False) -> None:
+        """
+        Records the latency of one external call.
+        """
+        key = (provider, model or "")
+        with self._lock:
+            histogram = self.latencies.get(key)
+            if histogram is None:
+                histogram = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0, "samples": []}
+                self.latencies[key] = histogram
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            histogram["samples"].append(seconds)
+            if error:
+                self.errors[key] += 1
+
+    def record_usage(self, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        """
+        Adds token usage for a model and the cost it implies under MODEL_PRICING.
+        """
+        pricing = MODEL_PRICING.get(model, {"prompt": 0.0, "completion": 0.0})
+        cost = (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1_000_000
+        with self._lock:
+            usage = self.usage[model]
+            usage["prompt_tokens"] += prompt_tokens or 0
+            usage["completion_tokens"] += completion_tokens or 0
+            usage["cost_usd"] += cost
+
+    def observe_queue(self, provider: str, model: str, depth: int, waited: Optional[float] = None) -> None:
+        """
+        Records the current queue depth of a scheduler lane and, once a call is
+        admitted, how long it waited.
+        """
+        with self._lock:
+            queue = self.queues[(provider, model or "")]
+            queue["depth"] = depth
+            queue["max_depth"] = max(queue["max_depth"], depth)
+            if waited is not None:
+                queue["admitted"] += 1
+                queue["wait_seconds"] += waited
+
+    def observe_fan_out_call(self, call_type: str, seconds: float) -> None:
+        """
+        Records how long one fan-out call of the given type ran once it was admitted,
+        e.g. to derive hedging delays for that type of call.
+        """
+        with self._lock:
+            self.fan_out_calls[call_type].append(seconds)
+
+    def fan_out_percentile(self, call_type: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        Returns the q-th percentile (0-100) of the running times of fan-out calls of
+        call_type, or None with fewer than min_samples samples.
+        """
+        with self._lock:
+            samples = sorted(self.fan_out_calls.get(call_type, []))
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = []
+            for (provider, model), histogram in sorted(self.latencies.items()):
+                samples = sorted(histogram["samples"])
+                calls.append({
+                    "provider": provider,
+                    "model": model,
+                    "count": histogram["count"],
+                    "errors": self.errors.get((provider, model), 0),
+                    "total_seconds": round(histogram["sum"], 3),
+                    "p50_seconds": round(samples[len(samples) // 2], 3),
+                    "p95_seconds": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+                    "max_seconds": round(samples[-1], 3),
+                })
+            return {
+                "started": self.started,
+                "wall_seconds": round(time.time() - self.started, 3),
+                "stages": {name: {"seconds": round(v["seconds"], 3), "count": v["count"]} for name, v in self.stages.items()},
+                "calls": calls,
+                "queues": [
+                    {"provider": provider, "model": model, **dict(queue, wait_seconds=round(queue["wait_seconds"], 3))}
+                    for (provider, model), queue in sorted(self.queues.items())
+                ],
+                "fan_out_calls": [
+                    {
+                        "call_type": call_type,
+                        "count": len(samples),
+                        "p50_seconds": round(sorted(samples)[len(samples) // 2], 3),
+                        "p95_seconds": round(sorted(samples)[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+                    }
+                    for call_type, samples in sorted(self.fan_out_calls.items()) if samples
+                ],
+                "usage": {model: dict(v, cost_usd=round(v["cost_usd"], 6)) for model, v in self.usage.items()},
+                "total_cost_usd": round(sum(v["cost_usd"] for v in self.usage.values()), 6),
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP post_news_stage_seconds Wall time spent in each pipeline stage.",
+            "# TYPE post_news_stage_seconds gauge",
+        ]
+        with self._lock:
+            for name, value in self.stages.items():
+                lines.append(f"post_news_stage_seconds{{{_labels(stage=name)}}} {value['seconds']:.6f}")
+
+            lines.append("# HELP post_news_call_latency_seconds Latency of external API calls.")
+            lines.append("# TYPE post_news_call_latency_seconds histogram")
+            for (provider, model), histogram in sorted(self.latencies.items()):
+                for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    lines.append(f"post_news_call_latency_seconds_bucket{{{_labels(provider=provider, model=model, le=bound)}}} {count}")
+                lines.append(f"post_news_call_latency_seconds_bucket{{{_labels(provider=provider, model=model, le='+Inf')}}} {histogram['count']}")
+                lines.append(f"post_news_call_latency_seconds_sum{{{_labels(provider=provider, model=model)}}} {histogram['sum']:.6f}")
+                lines.append(f"post_news_call_latency_seconds_count{{{_labels(provider=provider, model=model)}}} {histogram['count']}")
+
+            lines.append("# HELP post_news_call_errors_total Failed external API calls.")
+            lines.append("# TYPE post_news_call_errors_total counter")
+            for (provider, model), count in sorted(self.errors.items()):
+                lines.append(f"post_news_call_errors_total{{{_labels(provider=provider, model=model)}}} {count}")
+
+            lines.append("# HELP post_news_queue_depth Calls waiting in a scheduler lane.")
+            lines.append("# TYPE post_news_queue_depth gauge")
+            for (provider, model), queue in sorted(self.queues.items()):
+                lines.append(f"post_news_queue_depth{{{_labels(provider=provider, model=model)}}} {queue['depth']}")
+            lines.append("# HELP post_news_queue_max_depth Highest number of calls waiting in a scheduler lane.")
+            lines.append("# TYPE post_news_queue_max_depth gauge")
+            for (provider, model), queue in sorted(self.queues.items()):
+                lines.append(f"post_news_queue_max_depth{{{_labels(provider=provider, model=model)}}} {queue['max_depth']}")
+            lines.append("# HELP post_news_queue_wait_seconds Time calls spent waiting for admission.")
+            lines.append("# TYPE post_news_queue_wait_seconds summary")
+            for (provider, model), queue in sorted(self.queues.items()):
+                lines.append(f"post_news_queue_wait_seconds_sum{{{_labels(provider=provider, model=model)}}} {queue['wait_seconds']:.6f}")
+                lines.append(f"post_news_queue_wait_seconds_count{{{_labels(provider=provider, model=model)}}} {queue['admitted']}")
+
+            lines.append("# HELP post_news_tokens_total Tokens used per model.")
+            lines.append("# TYPE post_news_tokens_total counter")
+            for model, usage in self.usage.items():
+                lines.append(f"post_news_tokens_total{{{_labels(model=model, kind='prompt')}}} {usage['prompt_tokens']}")
+                lines.append(f"post_news_tokens_total{{{_labels(model=model, kind='completion')}}} {usage['completion_tokens']}")
+
+            lines.append("# HELP post_news_cost_usd_total Estimated spend per model in USD.")
+            lines.append("# TYPE post_news_cost_usd_total counter")
+            for model, usage in self.usage.items():
+                lines.append(f"post_news_cost_usd_total{{{_labels(model=model)}}} {usage['cost_usd']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, directory: str, extra: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Writes metrics.json and metrics.prom into directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        report = self.to_dict()
+        if extra:
+            report.update(extra)
+        with open(os.path.join(directory, "metrics.json"), "w") as f:
+            json.dump(report, f, indent=4)
+        with open(os.path.join(directory, "metrics.prom"), "w") as f:
+            f.write(self.to_prometheus())
+
+
+# Metrics of the current run, shared by all modules.
+metrics = Metrics()
@@ -0,0 +1,199 @@
+import concurrent.futures
+import json
+import logging
+import math
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+# Topic terms and their weights. Multi-word terms are matched as phrases.
+AI_TERMS = {
+    "artificial intelligence": 3.0,
+    "machine learning": 3.0,
+    "deep learning": 3.0,
+    "large language model": 3.0,
+    "large language models": 3.0,
+    "generative ai": 3.0,
+    "llm": 3.0,
+    "llms": 3.0,
+    "genai": 3.0,
+    "neural network": 2.5,
+    "transformer": 2.0,
+    "diffusion model": 2.5,
+    "reinforcement learning": 2.5,
+    "fine-tuning": 2.0,
+    "fine tuning": 2.0,
+    "rag": 1.5,
+    "retrieval augmented": 2.5,
+    "embedding": 1.5,
+    "embeddings": 1.5,
+    "inference": 1.0,
+    "prompt": 1.0,
+    "prompting": 1.5,
+    "agentic": 2.0,
+    "ai agent": 2.5,
+    "ai agents": 2.5,
+    "chatgpt": 3.0,
+    "gpt": 2.5,
+    "openai": 3.0,
+    "anthropic": 3.0,
+    "claude": 2.0,
+    "gemini": 2.0,
+    "deepmind": 3.0,
+    "llama": 2.0,
+    "mistral": 2.0,
+    "hugging face": 3.0,
+    "huggingface": 3.0,
+    "pytorch": 2.0,
+    "arxiv": 1.5,
+    "benchmark": 1.0,
+    "model": 0.5,
+    "models": 0.5,
+    "ai": 1.5,
+    "ml": 1.5,
+}
+
+# Word beginnings that hint at the topic in forms the terms above miss, like
+# "LLMOps", "GPT4o" or "finetuned". Posts scoring below DROP_SCORE that contain one
+# go to the LLM instead of being dropped.
+TOPIC_STEMS = [
+    "llm",
+    "gpt",
+    "genai",
+    "openai",
+    "chatbot",
+    "copilot",
+    "neural",
+    "transformer",
+    "diffusion",
+    "embedding",
+    "finetun",
+    "fine-tun",
+    "prompt",
+    "agentic",
+    "multimodal",
+    "inferenc",
+    "machine learn",
+    "deep learn",
+    "language model",
+    "foundation model",
+]
+
+# Posts scoring at least KEEP_SCORE are kept without asking the LLM, posts below
+# DROP_SCORE are dropped unless they contain a topic stem; everything else goes to
+# the LLM in batches.
+KEEP_SCORE = 4.0
+DROP_SCORE = 1.0
+LLM_BATCH_SIZE = 20
+LLM_CONCURRENCY = 4
+
+# A term must start a word but may be followed by a hyphen, so "AI-powered" and
+# "LLM-based" count.
+_TERM_PATTERNS = {
+    term: re.compile(r'(?<![\w-])' + re.escape(term) + r'(?!\w)', re.IGNORECASE)
+    for term in AI_TERMS
+}
+_STEM_PATTERN = re.compile(r'(?<![\w-])(?:' + "|".join(re.escape(stem) for stem in TOPIC_STEMS) + ')', re.IGNORECASE)
+
+
+def relevance_score(text: str) -> float:
+    """
+    Scores how much a post is about AI/ML/LLMs from weighted topic term counts.
+
+    Repeated terms add logarithmically and the total is lightly normalized by length,
+    so one passing mention in a long post scores lower than the same mention in a
+    short one.
+    """
+    words = max(1, len(text.split()))
+    score = 0.0
+    for term, pattern in _TERM_PATTERNS.items():
+        count = len(pattern.findall(text))
+        if count:
+            score += AI_TERMS[term] * (1 + math.log(count))
+    return score / max(1.0, math.log10(words))
+
+
+def _classify_batch(posts: List[str], call_llm: Callable[[str], str]) -> List[bool]:
+    numbered = "\n\n".join(f"[{i}]\n{post}" for i, post in enumerate(posts))
+    prompt = f"""
+For each numbered LinkedIn post below, decide whether it is related to Artificial Intelligence, Machine Learning, or Large Language Models.
+
+Respond only with a JSON array of objects, one per post, like [{{"id": 0, "decision": "keep"}}, {{"id": 1, "decision": "drop"}}].
+
+{numbered}
+"""
+    response = call_llm(prompt)
+    match = re.search(r'\[.*\]', response, re.DOTALL)
+    decisions: Dict[int, bool] = {}
+    try:
+        for item in json.loads(match.group(0)) if match else []:
+            decisions[int(item["id"])] = str(item.get("decision", "keep")).lower() != "drop"
+    except (ValueError, TypeError, KeyError, AttributeError):
+        logging.warning(f"Could not parse keep/drop response, keeping the batch: {response[:200]}")
+    # Posts the LLM didn't answer for are kept rather than silently lost
+    return [decisions.get(i, True) for i in range(len(posts))]
+
+
+def filter_posts(
+    posts: Iterable[str],
+    call_llm: Callable[[str], str],
+    keep_score: float = KEEP_SCORE,
+    drop_score: float = DROP_SCORE,
+    batch_size: int = LLM_BATCH_SIZE,
+    stats: Optional[Dict[str, int]] = None,
+) -> List[str]:
+    """
+    Filters posts to the ones about AI, ML or LLMs.
+
+    Each post is scored locally as it arrives. Clear keeps and drops are decided on
+    the spot; borderline posts, including low scorers that contain a topic stem, are
+    sent to call_llm in batches for a structured keep/drop decision, and those
+    batches run while posts are still arriving.
+
+    Returns:
+        List[str]: The kept posts in their original order.
+    """
+    decisions: Dict[int, bool] = {}
+    futures = {}
+    batch: List[int] = []
+    texts: List[str] = []
+    counts = {"kept": 0, "dropped": 0, "borderline": 0}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=LLM_CONCURRENCY) as executor:
+        def submit(indices: List[int]) -> None:
+            future = executor.submit(_classify_batch, [texts[i] for i in indices], call_llm)
+            futures[future] = indices
+
+        for post in posts:
+            index = len(texts)
+            texts.append(post)
+            score = relevance_score(post)
+            if score >= keep_score:
+                decisions[index] = True
+            elif score < drop_score and not _STEM_PATTERN.search(post):
+                decisions[index] = False
+            else:
+                counts["borderline"] += 1
+                batch.append(index)
+                if len(batch) >= batch_size:
+                    submit(batch)
+                    batch = []
+        if batch:
+            submit(batch)
+
+        for future in concurrent.futures.as_completed(futures):
+            indices = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                logging.error(f"Relevance batch failed, keeping its posts: {e}")
+                results = [True] * len(indices)
+            for index, keep in zip(indices, results):
+                decisions[index] = keep
+
+    kept = [texts[i] for i in range(len(texts)) if decisions.get(i, True)]
+    counts["kept"] = len(kept)
+    counts["dropped"] = len(texts) - len(kept)
+    print(f"Relevance filter: {counts['kept']} kept, {counts['dropped']} dropped, {counts['borderline']} sent to the LLM.")
+    if stats is not None:
+        stats.update(counts)
+    return kept
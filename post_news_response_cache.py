@@ -0,0 +1,305 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+# Values at least this large are stored zlib-compressed when compression is on.
+COMPRESS_MIN_BYTES = 1024
+
+# Legacy cache files: summaries named by the sha256 of their arXiv URL, and
+# one JSON file per key under responses/.
+_LEGACY_SUMMARY_NAME = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ResponseCache:
+    """
+    Content-addressed, size-bounded cache for API responses and paper summaries.
+
+    Entries are keyed on a hash of (endpoint, model, params) and stored in a single
+    SQLite file with their endpoint, model, creation and last access time and size.
+    Each endpoint has its own TTL, and the least recently used entries are evicted
+    once the cache grows past `max_bytes`. Large values are compressed.
+    """
+
+    # Time to live per endpoint in seconds; None means entries never expire.
+    DEFAULT_TTLS = {
+        "openai": 7 * 24 * 3600,
+        "perplexity": 6 * 3600,
+        "firecrawl": 12 * 3600,
+        # Hugging Face listings are only cached for past days, which never change
+        "hf_listing": None,
+        "paper_summary": None,
+    }
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttls: Optional[Dict[str, Optional[float]]] = None,
+        enabled: bool = True,
+        compress: bool = True,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = {**self.DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self.compress = compress
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_bytes = 0
+
+    @staticmethod
+    def make_key(endpoint: str, model: str, params: Any) -> str:
+        """
+        Builds the cache key for a request from its endpoint, model and parameters.
+        """
+        material = json.dumps([endpoint, model, params], sort_keys=True, default=str)
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the pipeline doesn't create the file.
+        # Callers hold self._lock.
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            # WAL lets other processes read while a run is writing
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        endpoint TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        created REAL NOT NULL,
+                        accessed REAL NOT NULL,
+                        size INTEGER NOT NULL,
+                        raw_size INTEGER NOT NULL,
+                        compressed INTEGER NOT NULL,
+                        value BLOB NOT NULL
+                    )
+                    """
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        return self._conn
+
+    def _encode(self, value: str):
+        raw = value.encode()
+        if self.compress and len(raw) >= COMPRESS_MIN_BYTES:
+            packed = zlib.compress(raw)
+            if len(packed) < len(raw):
+                return packed, len(raw), True
+        return raw, len(raw), False
+
+    def _evict(self, conn: sqlite3.Connection, max_bytes: int, keep: str = "") -> int:
+        # Callers hold self._lock.
+        evicted = 0
+        while self._total_bytes > max_bytes:
+            row = conn.execute("SELECT key, size FROM entries WHERE key != ? ORDER BY accessed LIMIT 1", (keep,)).fetchone()
+            if row is None:
+                break
+            conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            self._total_bytes -= row[1]
+            evicted += 1
+        return evicted
+
+    def get(self, endpoint: str, key: str) -> Optional[str]:
+        """
+        Returns the cached value for key, or None on a miss or an expired entry.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT created, size, compressed, value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses[endpoint] += 1
+                return None
+            created, size, compressed, value = row
+            ttl = self.ttls.get(endpoint)
+            if ttl is not None and time.time() - created > ttl:
+                with conn:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                self.misses[endpoint] += 1
+                return None
+            # Mark as most recently used
+            with conn:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.hits[endpoint] += 1
+        return (zlib.decompress(value) if compressed else value).decode()
+
+    def put(self, endpoint: str, key: str, value: str, model: str = "", created: Optional[float] = None) -> None:
+        """
+        Stores value under key and evicts least recently used entries past max_bytes.
+        """
+        if not self.enabled:
+            return
+        data, raw_size, compressed = self._encode(value)
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, endpoint, model, created, accessed, size, raw_size, compressed, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, endpoint, model, created or now, now, len(data), raw_size, int(compressed), data),
+                )
+                self._total_bytes += len(data) - (old[0] if old else 0)
+                # The entry just written is kept even if it alone exceeds max_bytes
+                self.evictions += self._evict(conn, self.max_bytes, keep=key)
+
+    def prune(self, max_bytes: Optional[int] = None) -> Dict[str, int]:
+        """
+        Deletes expired entries, then least recently used ones until the cache fits
+        in max_bytes (the configured limit by default).
+
+        Returns:
+            Dict[str, int]: The number of expired and evicted entries.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                expired = 0
+                for endpoint, ttl in self.ttls.items():
+                    if ttl is not None:
+                        expired += conn.execute(
+                            "DELETE FROM entries WHERE endpoint = ? AND created < ?", (endpoint, now - ttl)
+                        ).rowcount
+                self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                evicted = self._evict(conn, self.max_bytes if max_bytes is None else max_bytes)
+            conn.execute("VACUUM")
+        return {"expired": expired, "evicted": evicted}
+
+    def migrate_directory(self, directory: str) -> int:
+        """
+        Imports the legacy file cache in directory: paper summaries stored one file
+        per URL hash and responses stored one JSON file per key under responses/.
+        Imported files are deleted.
+
+        Returns:
+            int: The number of imported entries.
+        """
+        if not os.path.isdir(directory):
+            return 0
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if _LEGACY_SUMMARY_NAME.match(name) and os.path.isfile(path):
+                files.append((path, name, None))
+        responses_dir = os.path.join(directory, "responses")
+        if os.path.isdir(responses_dir):
+            for name in os.listdir(responses_dir):
+                if name.endswith(".json"):
+                    files.append((os.path.join(responses_dir, name), name[:-len(".json")], "json"))
+
+        imported = 0
+        enabled, self.enabled = self.enabled, True
+        try:
+            for path, key, kind in files:
+                try:
+                    with open(path, "r") as f:
+                        content = f.read()
+                    if kind == "json":
+                        entry = json.loads(content)
+                        self.put(entry["endpoint"], key, entry["value"], created=entry["created"])
+                    else:
+                        self.put("paper_summary", key, content, created=os.path.getmtime(path))
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Skipping unreadable cache file {path}: {e}")
+                    continue
+                os.remove(path)
+                imported += 1
+        finally:
+            self.enabled = enabled
+        if os.path.isdir(responses_dir) and not os.listdir(responses_dir):
+            os.rmdir(responses_dir)
+        return imported
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns hit/miss counters per endpoint plus the current size of the cache.
+        """
+        with self._lock:
+            endpoints = sorted(set(self.hits) | set(self.misses))
+            stats = {
+                "entries": 0,
+                "bytes": self._total_bytes,
+                "evictions": self.evictions,
+                "endpoints": {
+                    endpoint: {"hits": self.hits[endpoint], "misses": self.misses[endpoint]}
+                    for endpoint in endpoints
+                },
+            }
+            if self._conn is not None:
+                stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return stats
+
+    def describe(self) -> Dict[str, Any]:
+        """
+        Returns the stored entries, bytes and bytes before compression per endpoint.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT endpoint, COUNT(*), SUM(size), SUM(raw_size), MIN(created), MAX(accessed) FROM entries GROUP BY endpoint"
+            ).fetchall()
+        return {
+            endpoint: {
+                "entries": count,
+                "bytes": size,
+                "raw_bytes": raw_size,
+                "oldest_created": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created)),
+                "last_accessed": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(accessed)),
+            }
+            for endpoint, count, size, raw_size, created, accessed in rows
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the pipeline's response cache.")
+    parser.add_argument("--path", default=os.path.join("post_news_cache", "cache.sqlite3"), help="Cache file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show entries and sizes per endpoint.")
+    prune = commands.add_parser("prune", help="Delete expired entries and evict down to a size limit.")
+    prune.add_argument("--max-mb", type=float, default=None, help="Size limit in MB (default: the configured limit).")
+    migrate = commands.add_parser("migrate", help="Import a legacy one-file-per-entry cache directory.")
+    migrate.add_argument("directory", nargs="?", default="post_news_cache", help="Legacy cache directory.")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+    if args.command == "stats":
+        print(json.dumps(cache.describe(), indent=4))
+    elif args.command == "prune":
+        max_bytes = None if args.max_mb is None else int(args.max_mb * 1024 * 1024)
+        print(json.dumps(cache.prune(max_bytes), indent=4))
+    elif args.command == "migrate":
+        print(f"Imported {cache.migrate_directory(args.directory)} entries.")
+    cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+from datetime import date
+from typing import Iterable, List, Optional
+
+# Kinds of items tracked in the index.
+ARXIV = "arxiv"  # arXiv paper IDs
+URL = "url"  # canonical citation URLs
+POST = "post"  # LinkedIn post content hashes
+
+
+class SeenIndex:
+    """
+    Persistent SQLite index of the stories already published.
+
+    Items that go into a run's report are staged in memory; once the article is
+    published they are written with the publish date. Later runs use is_published to
+    drop items that were already covered before summarizing or generating anything.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the pipeline doesn't create the file.
+        # Callers hold self._lock.
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS seen (
+                        kind TEXT NOT NULL,
+                        key TEXT NOT NULL,
+                        published_on TEXT NOT NULL,
+                        PRIMARY KEY (kind, key)
+                    )
+                    """
+                )
+        return self._conn
+
+    def published_on(self, kind: str, key: str) -> Optional[str]:
+        """
+        Returns the date the item was first published, or None if it never was.
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT published_on FROM seen WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_published(self, kind: str, key: str) -> bool:
+        return self.published_on(kind, key) is not None
+
+    def filter_new(self, kind: str, keys: Iterable[str]) -> List[str]:
+        """
+        Returns the keys that were never published, in their original order.
+        """
+        return [key for key in keys if not self.is_published(kind, key)]
+
+    def stage(self, kind: str, keys: Iterable[str]) -> None:
+        """
+        Records items that went into the current report, to be marked published later.
+        """
+        with self._lock:
+            self._pending.update((kind, key) for key in keys)
+
+    def pending(self) -> List[List[str]]:
+        """
+        Returns the staged items as [kind, key] pairs, e.g. to checkpoint them.
+        """
+        with self._lock:
+            return [[kind, key] for kind, key in sorted(self._pending)]
+
+    def restore(self, items: Iterable[Iterable[str]]) -> None:
+        """
+        Stages [kind, key] pairs, e.g. those returned by pending when resuming a run.
+        """
+        with self._lock:
+            self._pending.update((kind, key) for kind, key in items)
+
+    def commit_published(self, published_on: Optional[date] = None) -> int:
+        """
+        Marks every staged item as published on the given date (today by default).
+        Items published earlier keep their original date.
+
+        Returns:
+            int: The number of staged items.
+        """
+        day = (published_on or date.today()).isoformat()
+        with self._lock:
+            pending = sorted(self._pending)
+            self._pending.clear()
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO seen (kind, key, published_on) VALUES (?, ?, ?)",
+                    [(kind, key, day) for kind, key in pending],
+                )
+        return len(pending)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None